@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""框架自身性能基准：本地桩服务 + BaseRequest 与原生 requests 的开销对比"""
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+【BaseRequest 框架开销基准测试】
+文件作用：
+1. 启动本地桩服务（benchmarks.stub_server），分别用 BaseRequest 和原生 requests 调用同一接口
+2. 按 响应体大小 × 并发数 组合测量：
+   - rps：每秒请求数（并发线程共同完成固定请求数）
+   - median_ms：单次调用耗时中位数（仅单并发测量，避免线程调度干扰）
+   - overhead_ms：BaseRequest 相对原生 requests 的单次额外耗时（URL拼接、日志、重试闭包、JSON解析等）
+   - alloc_kb：单次调用的内存分配峰值（tracemalloc，仅单并发测量）
+3. 与已保存的基线（benchmarks/baseline.json）对比，超过阈值判为性能回归，进程退出码为1
+使用方式（项目根目录执行）：
+   python -m benchmarks.bench_base_request                     # 运行并与基线对比
+   python -m benchmarks.bench_base_request --save-baseline     # 运行并保存为新基线
+   python -m benchmarks.bench_base_request --sizes 256,65536 --concurrency 1,8 --calls 300
+说明：基准期间关闭控制台日志输出；文件日志保留（属于框架真实开销），但改写到临时目录，
+      避免大响应体日志把项目 logs/ 下当天的日志轮转冲掉，基准结束后删除临时目录
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import contextlib
+import statistics
+import tracemalloc
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from core.base_request import BaseRequest
+from utils.log_util import logger
+from benchmarks.stub_server import StubServer, LOGIN_PATH, USER_INFO_PATH
+
+# 默认基线文件路径
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# 参与对比的指标：(指标名, 变大是否为变差)
+COMPARE_METRICS = [("rps", False), ("median_ms", True), ("overhead_ms", True), ("alloc_kb", True)]
+
+
+def make_raw_call(base_url: str, method: str, path: str, size: int):
+    """原生 requests 调用（与 BaseRequest 底层传输方式一致：独立 requests.Session 连接池，作为对照组）"""
+    url = f"{base_url}{path}"
+    headers = {"Content-Type": "application/json; charset=utf-8", "User-Agent": "ApiTestFramework/1.0"}
+    payload = {"account": "laity.wang", "password": "fKvOcEwY+O8ylM2CV8BHrQ=="} if method == "POST" else None
+    session = requests.Session()
+
+    def call():
+        response = session.request(method, url, headers=headers, params={"size": size}, json=payload, timeout=10)
+        return response.json()
+
+    return call
+
+
+def make_framework_call(base_url: str, method: str, path: str, size: int):
+    """BaseRequest 调用（被测对象）"""
+    client = BaseRequest(timeout=10)
+    client.base_url = base_url
+    payload = {"account": "laity.wang", "password": "fKvOcEwY+O8ylM2CV8BHrQ=="} if method == "POST" else None
+
+    def call():
+        if method == "POST":
+            response = client.post(path, json=payload, params={"size": size})
+        else:
+            response = client.get(path, params={"size": size})
+        return response.json()
+
+    return call
+
+
+def measure_latency(call, calls: int) -> float:
+    """单并发逐次调用，返回单次耗时中位数（毫秒）"""
+    durations = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def measure_rps(call, calls: int, concurrency: int) -> float:
+    """多线程并发调用固定次数，返回每秒请求数"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: call(), range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+def measure_alloc(call, calls: int) -> float:
+    """单次调用的内存分配峰值（KB，取多次调用的中位数）"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks)
+
+
+@contextlib.contextmanager
+def isolated_logging():
+    """
+    基准期间的日志隔离：
+    - 关闭控制台日志（大量请求日志刷屏会严重干扰测量）
+    - 文件日志换成写临时目录的同配置处理器（格式、轮转参数不变，写日志开销与真实运行一致），
+      不写入、不轮转项目 logs/ 下的真实运行日志
+    :return: 临时日志目录
+    """
+    console_handlers = [h for h in logger.handlers if type(h) is logging.StreamHandler]
+    file_handlers = [h for h in logger.handlers if isinstance(h, RotatingFileHandler)]
+    temp_dir = tempfile.mkdtemp(prefix="bench_logs_")
+    temp_handlers = []
+    for handler in file_handlers:
+        temp_handler = RotatingFileHandler(
+            os.path.join(temp_dir, os.path.basename(handler.baseFilename)), maxBytes=handler.maxBytes,
+            backupCount=handler.backupCount, encoding=handler.encoding
+        )
+        temp_handler.setFormatter(handler.formatter)
+        temp_handler.setLevel(handler.level)
+        temp_handlers.append(temp_handler)
+    for handler in console_handlers + file_handlers:
+        logger.removeHandler(handler)
+    for handler in temp_handlers:
+        logger.addHandler(handler)
+    try:
+        yield temp_dir
+    finally:
+        for handler in temp_handlers:
+            logger.removeHandler(handler)
+            handler.close()
+        for handler in file_handlers + console_handlers:
+            logger.addHandler(handler)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run_benchmarks(sizes, concurrency_levels, calls: int) -> dict:
+    """
+    执行全部基准组合
+    :return: 结果字典，格式：{"POST /xxx|size=256|c=1": {"raw": {...}, "framework": {...}}}
+    """
+    results = {}
+    with StubServer() as server:
+        for method, path in (("POST", LOGIN_PATH), ("GET", USER_INFO_PATH)):
+            for size in sizes:
+                calls_by_client = {
+                    "raw": make_raw_call(server.base_url, method, path, size),
+                    "framework": make_framework_call(server.base_url, method, path, size),
+                }
+                # 预热：建立连接、触发模块级缓存，避免首轮冷启动污染结果
+                for call in calls_by_client.values():
+                    for _ in range(10):
+                        call()
+                for concurrency in concurrency_levels:
+                    case = {}
+                    for name, call in calls_by_client.items():
+                        metrics = {"rps": measure_rps(call, calls, concurrency)}
+                        if concurrency == 1:
+                            metrics["median_ms"] = measure_latency(call, calls)
+                            metrics["alloc_kb"] = measure_alloc(call, max(calls // 10, 10))
+                        case[name] = metrics
+                    if concurrency == 1:
+                        case["framework"]["overhead_ms"] = case["framework"]["median_ms"] - case["raw"]["median_ms"]
+                    key = f"{method} {path}|size={size}|c={concurrency}"
+                    results[key] = case
+                    print(format_case(key, case))
+    return results
+
+
+def format_case(key: str, case: dict) -> str:
+    """格式化单个组合的结果（一行）"""
+    raw, framework = case["raw"], case["framework"]
+    line = f"{key:<50} rps 原生={raw['rps']:8.1f} 框架={framework['rps']:8.1f}"
+    if "overhead_ms" in framework:
+        line += (f" | 中位数 原生={raw['median_ms']:.3f}ms 框架={framework['median_ms']:.3f}ms"
+                 f" 开销={framework['overhead_ms']:.3f}ms | 分配 原生={raw['alloc_kb']:.1f}KB"
+                 f" 框架={framework['alloc_kb']:.1f}KB")
+    return line
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float, min_overhead_ms: float) -> list:
+    """
+    与基线对比框架侧指标（原生侧仅作参照，不判回归）
+    :param threshold: 相对变差比例阈值，例：0.2 表示变差超过20%判为回归
+    :param min_overhead_ms: overhead_ms 的绝对变化下限（低于此值视为噪声）
+    :return: 回归描述列表
+    """
+    regressions = []
+    for key, case in results.items():
+        if key not in baseline:
+            continue
+        current, base = case["framework"], baseline[key]["framework"]
+        for metric, higher_is_worse in COMPARE_METRICS:
+            if metric not in current or metric not in base or not base[metric]:
+                continue
+            change = (current[metric] - base[metric]) / abs(base[metric])
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if metric == "overhead_ms" and current[metric] - base[metric] < min_overhead_ms:
+                worse = False
+            if worse:
+                regressions.append(f"{key} {metric}：基线{base[metric]:.3f} → 本次{current[metric]:.3f}（{change:+.1%}）")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BaseRequest 框架开销基准测试")
+    parser.add_argument("--sizes", default="256,16384,1048576", help="响应体大小（字节），逗号分隔")
+    parser.add_argument("--concurrency", default="1,4,16", help="并发线程数，逗号分隔")
+    parser.add_argument("--calls", type=int, default=200, help="每个组合的调用次数")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回归判定阈值（相对变差比例）")
+    parser.add_argument("--min-overhead-ms", type=float, default=0.5, help="框架开销绝对变化的噪声下限（毫秒）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+
+    with isolated_logging():
+        results = run_benchmarks(sizes, concurrency_levels, args.calls)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存：{args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"未找到基线文件：{args.baseline}（可先执行 --save-baseline 生成）")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.threshold, args.min_overhead_ms)
+    if regressions:
+        print("===== 框架性能回归 =====")
+        for line in regressions:
+            print(line)
+        return 1
+    print("与基线对比：未发现性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
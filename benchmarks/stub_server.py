@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+【本地HTTP桩服务】
+文件作用：
+1. 为基准测试提供稳定、无网络抖动的本地接口，排除被测服务本身的耗时
+2. 模拟项目真实接口的响应结构：
+   - POST /syslogin/admin/user/login：登录响应（code/msg/data.token）
+   - GET  /api/v1/user/info：个人信息响应（code/msg/data.username/nickname/phone）
+3. 响应体大小可配置：请求参数 size=字节数（通过 data.padding 字段填充到目标大小）
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 接口路径常量（与用例中的真实接口保持一致）
+LOGIN_PATH = "/syslogin/admin/user/login"
+USER_INFO_PATH = "/api/v1/user/info"
+
+
+def build_body(path: str, size: int = 0) -> bytes:
+    """
+    构造接口响应体（JSON字节串）
+    :param path: 接口路径（决定响应结构）
+    :param size: 目标响应体大小（字节），不足时用padding字段补齐
+    :return: JSON字节串
+    """
+    if path == LOGIN_PATH:
+        data = {"token": "stub_token_" + "0" * 32, "userId": 113}
+    else:
+        data = {"user_id": 1001, "username": "test_user", "nickname": "测试用户_2026", "phone": "13800138000"}
+    body = {"code": 200, "msg": "success", "data": data}
+    raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    if size > len(raw):
+        # padding字段本身约占16字节（"padding": ""）
+        data["padding"] = "x" * max(size - len(raw) - 16, 0)
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    return raw
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """桩服务请求处理器（未知路径返回404）"""
+    protocol_version = "HTTP/1.1"
+    # 关闭Nagle算法：响应头、响应体分两次写出，keep-alive客户端否则会因延迟ACK每次多等约40ms
+    disable_nagle_algorithm = True
+    # 响应体缓存：{(path, size): bytes}，避免桩服务自身序列化耗时干扰测量
+    _body_cache = {}
+
+    def _reply(self):
+        url = urlparse(self.path)
+        if url.path not in (LOGIN_PATH, USER_INFO_PATH):
+            self.send_error(404)
+            return
+        # 读完请求体，保证keep-alive连接可复用
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        size = int(parse_qs(url.query).get("size", ["0"])[0])
+        key = (url.path, size)
+        if key not in self._body_cache:
+            self._body_cache[key] = build_body(url.path, size)
+        body = self._body_cache[key]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        """关闭访问日志（避免桩服务打印干扰基准结果）"""
+
+
+class StubServer:
+    """本地桩服务（后台线程运行，支持with语句自动启停）"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        :param host: 监听地址，默认仅本机
+        :param port: 监听端口，默认0（系统分配空闲端口）
+        """
+        self.httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # 单独启动桩服务（手工调试用）：python -m benchmarks.stub_server
+    server = StubServer(port=18080).start()
+    print(f"桩服务已启动：{server.base_url}（Ctrl+C退出）")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,10 +1,140 @@
 """极简pytest夹具"""
+import html
 import pytest
 from core.db_operation import db_util
-from utils.log_util import logger
+from core.ssh_capture import SSHCapture
+from core.base_request import request_util
+from core.shadow_request import shadow_report
+from core.token_cache import token_cache
+from data.login_data import success_case
+from utils.log_util import logger, current_test_id
+from utils.perf_util import latency_recorder
+
+
+def pytest_addoption(parser):
+    """命令行参数：--shadow-env=pre 开启跨环境影子对比"""
+    parser.addoption("--shadow-env", default=None, help="影子对比环境（如pre），请求同时发往该环境并对比响应")
+
+
+def pytest_configure(config):
+    """注册自定义标记：@pytest.mark.sla(p95=200, max=500, endpoint="POST /xxx")，单位毫秒；按需开启影子对比"""
+    config.addinivalue_line("markers", "sla(p50, p90, p95, p99, max, endpoint): 用例接口耗时SLA（毫秒）")
+    if config.getoption("--shadow-env"):
+        request_util.enable_shadow(config.getoption("--shadow-env"))
+
+
+def pytest_sessionstart(session):
+    """会话开始：重置耗时/影子对比汇总（run_daemon.py常驻进程中多次运行互不干扰）"""
+    latency_recorder.reset()
+    shadow_report.reset()
+
+
+def pytest_runtest_logstart(nodeid, location):
+    """用例开始（含夹具setup）：日志上下文绑定用例nodeid，便于utils.log_index按用例检索"""
+    current_test_id.set(nodeid)
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    """用例结束（含夹具teardown）：解除日志上下文中的用例绑定"""
+    current_test_id.set("-")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """用例执行期间标记当前用例（耗时样本归属），执行成功后校验SLA"""
+    latency_recorder.current_test = item.nodeid
+    try:
+        result = yield
+    finally:
+        latency_recorder.current_test = None
+    marker = item.get_closest_marker("sla")
+    if marker:
+        latency_recorder.check_sla(item.nodeid, **marker.kwargs)
+    return result
+
+
+def pytest_sessionfinish(session):
+    """
+    运行结束：本次耗时写入历史库，作为后续运行的基线
+    pytest-xdist（-n）时worker只回传样本和影子对比汇总，由主进程合并后统一检测回归、写历史库
+    """
+    request_util.disable_shadow()
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["latency"] = latency_recorder.export()
+        workeroutput["shadow"] = shadow_report.export()
+        return
+    latency_recorder.detect_regressions()
+    latency_recorder.save()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """pytest-xdist主进程：合并worker回传的耗时样本、SLA结果和影子对比汇总"""
+    workeroutput = getattr(node, "workeroutput", None) or {}
+    if "latency" in workeroutput:
+        latency_recorder.merge(workeroutput["latency"])
+    if "shadow" in workeroutput:
+        shadow_report.merge(workeroutput["shadow"])
+
+
+def pytest_terminal_summary(terminalreporter):
+    """终端汇总：输出SLA不达标和性能回归的接口、影子对比汇总"""
+    lines = latency_recorder.summary_lines()
+    if lines:
+        terminalreporter.section("接口耗时SLA / 性能回归")
+        for line in lines:
+            terminalreporter.write_line(line)
+            logger.warning(line)
+    shadow_lines = shadow_report.summary_lines()
+    if shadow_lines:
+        terminalreporter.section("跨环境影子对比")
+        for line in shadow_lines:
+            terminalreporter.write_line(line)
+            logger.info(line)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix):
+    """pytest-html报告摘要：附加SLA不达标、性能回归和影子对比信息"""
+    for line in latency_recorder.summary_lines():
+        prefix.append(f"<p style='color:#c00'>{html.escape(line)}</p>")
+    for line in shadow_report.summary_lines():
+        prefix.append(f"<p>{html.escape(line)}</p>")
+
+
+@pytest.fixture(scope="session")
+def login_token():
+    """登录并返回token（同一环境+账号在有效期内只登录一次，缓存见core.token_cache，常驻进程中跨多次运行复用）"""
+    account = success_case["request_data"]["account"]
+
+    def login():
+        resp = request_util.post(path="/syslogin/admin/user/login", json=success_case["request_data"])
+        return resp.json()["data"]["token"]
+
+    return token_cache.get((request_util.base_url, account), login)
+
 
 @pytest.fixture(scope="function")
 def db_connect():
     db_util.connect()
     yield
-    db_util.close()
\ No newline at end of file
+    db_util.close()
+
+
+@pytest.fixture(scope="function")
+def server_capture(request):
+    """
+    用例期间后台采集服务端日志/指标（不阻塞用例），结束后按请求时间对齐并写入日志
+    用法：def test_xxx(server_capture): ...；用例内也可调用 server_capture.read(...) 查看实时数据
+    """
+    capture = SSHCapture().start()
+    yield capture
+    capture.stop()
+    samples = [s for s in latency_recorder.samples if s["test_id"] == request.node.nodeid]
+    for item in capture.correlate(samples):
+        logger.info(f"服务端数据对齐：{item['endpoint']} 耗时{item['elapsed_ms']:.1f}ms，"
+                    + "，".join(f"{stream} {len(rows)}行" for stream, rows in item["server"].items()))
+        for stream, rows in item["server"].items():
+            for timestamp, line in rows:
+                logger.info(f"  [{stream} {timestamp:.3f}] {line}")
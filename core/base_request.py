@@ -7,17 +7,29 @@
 3. 设计原则：单一职责（仅处理请求）、高复用（所有接口复用）、易扩展（新增请求方法仅需新增函数）
 4. 依赖说明：
    - requests：底层请求库
-   - utils.common_util：配置读取、重试装饰器
-   - utils.log_util：日志记录
+   - utils.common_util：配置读取、重试装饰器、流式摘要
+   - utils.log_util：日志记录（含请求关联ID日志上下文）
+   - utils.perf_util：接口耗时采集（SLA断言、性能回归检测）
+   - core.shadow_request：跨环境影子对比（可选开启）
 """
+import os
+import time
+import uuid
+from http.cookiejar import DefaultCookiePolicy
 import requests
 from requests.exceptions import (
     RequestException, Timeout, ConnectionError, HTTPError
 )
-# 导入项目通用工具：配置读取、重试装饰器
-from utils.common_util import get_env_base_url, retry
+# 导入项目通用工具：配置读取、重试装饰器、流式摘要
+from utils.common_util import (
+    get_env_base_url, retry, StreamHasher, iter_file_chunks, DEFAULT_CHUNK_SIZE
+)
 # 导入日志工具：统一日志格式
-from utils.log_util import logger
+from utils.log_util import logger, current_request_id
+# 导入耗时记录器：每次请求的耗时用于SLA断言和历史基线对比
+from utils.perf_util import latency_recorder
+# 导入影子对比器：开启后同一请求并发发送到另一环境并对比响应
+from core.shadow_request import ShadowComparator
 
 
 class BaseRequest:
@@ -28,6 +40,8 @@ class BaseRequest:
     - 封装通用 _request 方法，抽离所有请求的公共逻辑（日志、重试、异常）
     - 具体请求方法（get/post等）仅需传递专属参数，调用通用方法即可
     """
+    # 请求关联ID的请求头名称（服务端日志可按此ID与用例日志对应）
+    CORRELATION_HEADER = "X-Request-ID"
 
     def __init__(self, env: str = "test", timeout: int = 10, retry_config: dict = None):
         """
@@ -48,6 +62,47 @@ class BaseRequest:
         self.timeout = timeout
         # 4. 重试配置（默认3次重试，间隔1秒）
         self.retry_config = retry_config or {"max_retries": 3, "delay": 1}
+        # 5. 是否记录耗时样本（影子环境的请求对象关闭，避免污染主环境的SLA/历史基线）
+        self.record_latency = True
+        # 6. 影子对比器（默认关闭，通过enable_shadow开启）
+        self.shadow = None
+        # 7. 请求变换列表（发送前按添加顺序执行，如字段加密、签名，见utils.crypto_util）
+        self.transforms = []
+        # 8. HTTP会话：连接池复用TCP连接（常驻进程中跨多次运行保持热连接）
+        #    不保存服务端Cookie，与逐次调用requests.request的行为保持一致
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def add_transform(self, transform) -> None:
+        """
+        添加请求变换（发送前执行，可修改请求头和请求参数）
+        :param transform: 可调用对象，签名：transform(method, path, headers, kwargs) -> None
+                          headers为本次请求的完整请求头，kwargs为params/json/data等请求参数，均可原地修改
+                          例：utils.crypto_util.AESFieldTransform()、utils.crypto_util.SignTransform()
+        """
+        if not callable(transform):
+            logger.error(f"添加请求变换失败：参数不可调用，传入值：{transform}")
+            raise TypeError("transform必须是可调用对象")
+        self.transforms.append(transform)
+        logger.info(f"请求变换已添加：{type(transform).__name__}")
+
+    def enable_shadow(self, env: str, ignore_fields: list = None) -> None:
+        """
+        开启影子对比：之后每个请求同时并发发送到影子环境，结构化对比响应并按接口汇总
+        :param env: 影子环境，例：pre
+        :param ignore_fields: 忽略的易变字段（fnmatch通配），默认读取配置 SHADOW.ignore_fields
+        """
+        # 影子侧不重试：影子环境不可用时不拖慢主环境用例（对比的等待上限同主请求超时）
+        client = BaseRequest(env=env, timeout=self.timeout, retry_config={"max_retries": 1, "delay": 0})
+        client.record_latency = False
+        self.shadow = ShadowComparator(client, ignore_fields)
+        logger.info(f"影子对比已开启：影子环境={env}（{client.base_url}），忽略字段：{self.shadow.ignore_fields}")
+
+    def disable_shadow(self) -> None:
+        """关闭影子对比（等待进行中的影子请求和对比结束，对比等待有上限）"""
+        if self.shadow:
+            self.shadow.close()
+            self.shadow = None
 
     def update_headers(self, headers: dict) -> None:
         """
@@ -75,21 +130,55 @@ class BaseRequest:
         logger.info(f"拼接完整URL：{full_url}")
         return full_url
 
-    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+    def _request(self, method: str, path: str, retry_config: dict = None, **kwargs) -> requests.Response:
         """
         通用请求方法（核心封装，所有具体请求方法都调用此方法）
         封装逻辑：URL拼接 + 日志记录 + 重试 + 异常捕获 + 响应返回
         :param method: 请求方法（GET/POST/PUT/DELETE/PATCH，大小写均可）
         :param path: 接口路径
+        :param retry_config: 本次请求的重试配置（不传则使用初始化时的配置）
         :param kwargs: 可变参数，支持requests的所有参数：
                        - params: GET请求参数（字典）
                        - json: POST/PUT请求的JSON参数（字典）
-                       - data: 表单请求参数（字典/字节）
+                       - data: 表单请求参数（字典/字节/分块生成器）
                        - files: 文件上传参数（字典）
                        - cookies: Cookie参数（字典）
+                       - headers: 本次请求的专属头（与公共请求头合并，同名覆盖）
+                       - stream: True时不预读响应体（大文件下载用，响应体不写日志）
         :return: requests.Response对象（包含响应状态码、响应体、响应头等）
         :raises RequestException: 所有请求异常统一抛出，上层可捕获处理
         """
+        # 0. 请求关联ID：写入请求头（调用方已指定则沿用）+ 日志上下文（本次请求的所有日志行都带此ID）
+        headers = {**self.headers, **(kwargs.pop("headers", None) or {})}
+        request_id = headers.setdefault(self.CORRELATION_HEADER, uuid.uuid4().hex)
+        # 请求变换（加密/签名）在影子请求提交前执行，两个环境收到相同的请求
+        for transform in self.transforms:
+            transform(method.upper(), path, headers, kwargs)
+        # 影子对比：影子请求先提交到线程池，与主请求并发执行
+        shadow_future = None
+        if self.shadow and ShadowComparator.supports(kwargs):
+            shadow_started = time.monotonic()
+            shadow_future = self.shadow.submit(method, path, headers, kwargs)
+        token = current_request_id.set(request_id)
+        try:
+            response = self._send(method, path, headers, retry_config or self.retry_config, **kwargs)
+        except Exception as e:
+            if shadow_future:
+                self.shadow.compare_async(method, path, ShadowComparator.outcome(error=e), shadow_future, shadow_started)
+            raise
+        finally:
+            current_request_id.reset(token)
+        if shadow_future:
+            # 对比在后台线程等待影子结果，用例线程直接返回主环境响应
+            self.shadow.compare_async(method, path, ShadowComparator.outcome(response=response), shadow_future,
+                                      shadow_started)
+        return response
+
+    def _send(self, method: str, path: str, headers: dict, retry_config: dict, **kwargs) -> requests.Response:
+        """
+        执行请求（_request的内部实现，调用时日志上下文已绑定请求关联ID）
+        每个请求结束时输出一行"请求摘要"（method/path/status），供utils.log_index按接口、状态码建索引
+        """
         # 1. 预处理：统一请求方法为大写，拼接完整URL
         method = method.upper()
         full_url = self._get_full_url(path)
@@ -97,45 +186,54 @@ class BaseRequest:
         # 2. 日志记录：请求开始（便于排查问题）
         logger.info(f"===== 开始{method}请求 =====")
         logger.info(f"请求URL：{full_url}")
-        logger.info(f"请求头：{self.headers}")
+        logger.info(f"请求头：{headers}")
         # 按参数类型记录请求参数（区分GET/POST参数）
         if "params" in kwargs:
             logger.info(f"GET请求参数：{kwargs['params']}")
         if "json" in kwargs:
             logger.info(f"JSON请求参数：{kwargs['json']}")
-        if "data" in kwargs:
+        if "data" in kwargs and isinstance(kwargs["data"], (dict, str, bytes)):
             logger.info(f"表单请求参数：{kwargs['data']}")
+        elif "data" in kwargs:
+            logger.info("请求体为分块数据流（不记录内容）")
 
         try:
             # 3. 执行请求（带重试机制）
             # 应用重试装饰器：根据初始化的重试配置设置重试次数和间隔
             @retry(
-                max_retries=self.retry_config["max_retries"],
-                delay=self.retry_config["delay"],
+                max_retries=retry_config["max_retries"],
+                delay=retry_config["delay"],
                 exceptions=(Timeout, ConnectionError)  # 仅对超时/连接错误重试
             )
             def send_request():
                 """内部函数：用于应用重试装饰器"""
-                return requests.request(
+                return self.session.request(
                     method=method,
                     url=full_url,
-                    headers=self.headers,
+                    headers=headers,
                     timeout=self.timeout,
                     **kwargs
                 )
 
             # 执行请求（触发重试逻辑）
             response = send_request()
+            if self.record_latency:
+                latency_recorder.record(method, path, response.elapsed.total_seconds() * 1000, response.status_code)
 
             # 4. 日志记录：响应结果
             logger.info(f"===== {method}请求响应 =====")
-            logger.info(f"响应状态码：{response.status_code}")
+            logger.info(f"响应状态码：{response.status_code}，耗时：{response.elapsed.total_seconds() * 1000:.1f}ms")
             logger.info(f"响应头：{dict(response.headers)}")
+            self._log_summary(method, path, response.status_code)
             # 尝试解析响应体（避免非JSON响应报错）
-            try:
-                logger.info(f"响应体（JSON）：{response.json()}")
-            except ValueError:
-                logger.info(f"响应体（文本）：{response.text}")
+            # 流式响应不预读响应体，由调用方按块消费（避免大文件整体载入内存）
+            if kwargs.get("stream"):
+                logger.info("响应体为流式数据（不记录内容）")
+            else:
+                try:
+                    logger.info(f"响应体（JSON）：{response.json()}")
+                except ValueError:
+                    logger.info(f"响应体（文本）：{response.text}")
 
             # 5. 主动抛出HTTP错误（状态码>=400时，便于上层捕获）
             response.raise_for_status()
@@ -145,20 +243,31 @@ class BaseRequest:
         except (Timeout, ConnectionError) as e:
             # 超时/连接错误（已重试，仍失败则记录并抛出）
             logger.error(f"{method}请求失败：{full_url}，超时/连接错误，错误信息：{str(e)}")
+            self._log_summary(method, path, "ERR")
             raise RequestException(f"请求超时/连接失败：{str(e)}") from e
         except HTTPError as e:
             # HTTP错误（状态码>=400）
             logger.error(f"{method}请求失败：{full_url}，HTTP错误，状态码：{response.status_code}，错误信息：{str(e)}")
+            if kwargs.get("stream"):
+                # 流式响应不会交给调用方消费，立即关闭，归还连接池中的连接
+                response.close()
             raise RequestException(f"HTTP请求失败：状态码{response.status_code}，{str(e)}") from e
         except RequestException as e:
             # 其他请求错误（如URL无效、参数错误）
             logger.error(f"{method}请求失败：{full_url}，通用请求错误，错误信息：{str(e)}")
+            self._log_summary(method, path, "ERR")
             raise RequestException(f"请求失败：{str(e)}") from e
         except Exception as e:
             # 未知错误（兜底捕获）
             logger.error(f"{method}请求失败：{full_url}，未知错误，错误信息：{str(e)}")
+            self._log_summary(method, path, "ERR")
             raise Exception(f"未知请求错误：{str(e)}") from e
 
+    @staticmethod
+    def _log_summary(method: str, path: str, status) -> None:
+        """输出请求摘要行（固定格式，utils.log_index据此解析接口路径和状态码）"""
+        logger.info(f"请求摘要：method={method} path={path} status={status}")
+
     def get(self, path: str, params: dict = None, **kwargs) -> requests.Response:
         """
         GET请求方法（查询数据专用，参数拼在URL后）
@@ -213,6 +322,91 @@ class BaseRequest:
         """
         return self._request(method="PATCH", path=path, json=json, **kwargs)
 
+    def upload_stream(self, path: str, source, method: str = "POST", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      content_type: str = "application/octet-stream", **kwargs) -> tuple:
+        """
+        流式上传（分块传输，适合GB级导入文件，内存占用恒定）
+        请求体以chunked方式发送，发送过程中增量计算MD5/SHA-256
+        注意：数据流只能消费一次，因此流式上传不做失败重试
+        :param path: 接口路径，例：/api/v1/import
+        :param source: 上传数据源：文件路径 / 已打开的二进制文件对象 / bytes / 产出bytes的生成器
+        :param method: 请求方法，默认POST（PUT上传也可）
+        :param chunk_size: 读取文件时每块字节数（source为生成器时以生成器产出为准）
+        :param content_type: 请求体类型，默认application/octet-stream
+        :param kwargs: 其他可选参数（如params、headers等）
+        :return: (requests.Response对象, 校验信息字典{"md5", "sha256", "size"})
+        """
+        hasher = StreamHasher()
+        if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+            chunks = iter_file_chunks(source, chunk_size)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            # 内存中的字节串整体作为一块发送（直接iter会逐字节产出int）
+            chunks = iter([bytes(source)])
+        else:
+            chunks = iter(source)
+
+        def hashed_chunks():
+            """内部生成器：发送的同时更新摘要"""
+            for chunk in chunks:
+                hasher.update(chunk)
+                yield chunk
+
+        headers = {"Content-Type": content_type, **(kwargs.pop("headers", None) or {})}
+        response = self._request(
+            method=method, path=path, data=hashed_chunks(), headers=headers,
+            retry_config={"max_retries": 1, "delay": 0}, **kwargs
+        )
+        checksum = hasher.result()
+        logger.info(f"流式上传完成：共{checksum['size']}字节，md5={checksum['md5']}，sha256={checksum['sha256']}")
+        return response, checksum
+
+    def download_stream(self, path: str, save_path: str = None, callback=None, method: str = "GET",
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> tuple:
+        """
+        流式下载（按块写入磁盘或交给回调处理，适合GB级导出文件，内存占用恒定）
+        下载过程中增量计算MD5/SHA-256，响应体不写日志
+        :param path: 接口路径，例：/api/v1/export
+        :param save_path: 保存文件路径（与callback至少传一个，可同时传）
+        :param callback: 分块回调函数，签名：callback(chunk: bytes) -> None
+        :param method: 请求方法，默认GET
+        :param chunk_size: 每块字节数（缓冲区上限）
+        :param kwargs: 其他可选参数（如params、headers等）
+        :return: (requests.Response对象, 校验信息字典{"md5", "sha256", "size"})
+        """
+        if save_path is None and callback is None:
+            raise ValueError("save_path和callback至少需要传一个")
+        hasher = StreamHasher()
+        # 状态码>=400时_request抛出异常，流式响应已在_send中关闭，此时尚未创建保存文件
+        response = self._request(method=method, path=path, stream=True, **kwargs)
+        file_obj = None
+        try:
+            file_obj = open(save_path, "wb") if save_path else None
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                hasher.update(chunk)
+                if file_obj:
+                    file_obj.write(chunk)
+                if callback:
+                    callback(chunk)
+        except Exception:
+            # 下载中断：删除不完整的文件，避免被误当作完整文件使用
+            if file_obj:
+                file_obj.close()
+                os.remove(save_path)
+                file_obj = None
+            logger.error(f"流式下载中断：{path}，已接收{hasher.size}字节"
+                         + (f"，已删除不完整文件：{save_path}" if save_path else ""))
+            raise
+        finally:
+            if file_obj:
+                file_obj.close()
+            response.close()
+        checksum = hasher.result()
+        logger.info(f"流式下载完成：共{checksum['size']}字节，md5={checksum['md5']}，sha256={checksum['sha256']}"
+                    + (f"，已保存至：{save_path}" if save_path else ""))
+        return response, checksum
+
 
 # -------------------------- 全局请求对象（项目通用） --------------------------
 """
@@ -13,8 +13,17 @@ class DBOperation:
         self.charset = read_config("DATABASE", "charset")
         self.conn = None
         self.cursor = None
+        # 常驻模式（run_daemon.py开启）：close()不真正断开，下次connect()复用已有连接
+        self.keep_alive = False
 
     def connect(self):
+        if self.keep_alive and self.conn and self.conn.open:
+            # 复用常驻连接（ping自动重连），跳过建连耗时；关闭上一次的游标，避免每个用例泄漏一个
+            self.conn.ping(reconnect=True)
+            if self.cursor:
+                self.cursor.close()
+            self.cursor = self.conn.cursor()
+            return
         try:
             self.conn = pymysql.connect(
                 host=self.host, port=self.port, user=self.user, password=self.password,
@@ -27,7 +36,7 @@ class DBOperation:
             raise
 
     def query(self, sql, params=None):
-        if not self.conn:
+        if not self.conn or not self.cursor:
             self.connect()
         try:
             self.cursor.execute(sql, params)
@@ -36,11 +45,19 @@ class DBOperation:
             logger.error(f"SQL查询失败：{str(e)}")
             raise
 
-    def close(self):
+    def close(self, force=False):
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
+        if self.keep_alive and not force:
+            # 常驻模式保留连接，但结束当前事务：autocommit关闭时InnoDB（REPEATABLE READ）会沿用
+            # 首次查询的一致性快照，不回滚则之后的用例读不到接口新写入的数据
+            if self.conn and self.conn.open:
+                self.conn.rollback()
+            return
         if self.conn:
             self.conn.close()
+            self.conn = None
         logger.info("数据库连接已关闭")
 
 db_util = DBOperation()
\ No newline at end of file
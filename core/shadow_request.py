@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+【跨环境影子对比】
+文件作用：
+1. 主环境请求发出的同时，把同一请求并发发送到影子环境（如 test 对比 pre），总耗时≈单环境耗时
+2. 对两侧响应做结构化对比（JSON逐字段比较），支持忽略易变字段（token、时间戳、traceId等）
+3. 按接口汇总：调用次数、不一致次数、高频差异字段、两侧耗时P50/P95，输出到运行汇总和HTML报告
+4. 影子侧的任何异常只记录为差异，不影响用例结果；用例断言仍基于主环境响应
+5. 对比在后台线程执行，用例线程不等待影子请求；影子请求超过等待上限（默认同主请求超时）记为超时差异
+使用方式：
+   pytest --shadow-env=pre                         # conftest为全局request_util开启影子对比
+   request_util.enable_shadow("pre")               # 或在代码中手动开启
+   request_util.shadow.header_overrides = {"token": "pre环境token"}   # 环境相关的请求头可单独覆盖
+"""
+import json
+import time
+import numbers
+import fnmatch
+import threading
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from utils.common_util import read_config
+from utils.log_util import logger
+from utils.perf_util import percentile
+
+
+def _same_type(left, right) -> bool:
+    """
+    判断两个JSON值类型是否一致：数值不区分int/float（不同环境序列化可能为1或1.0），
+    bool单独成类（避免true与1视为同类型）
+    """
+    if isinstance(left, bool) or isinstance(right, bool):
+        return type(left) is type(right)
+    if isinstance(left, numbers.Number) and isinstance(right, numbers.Number):
+        return True
+    return type(left) is type(right)
+
+
+def json_diff(left, right, ignore_fields=(), path: str = "") -> list:
+    """
+    结构化对比两个JSON对象
+    :param left: 主环境数据
+    :param right: 影子环境数据
+    :param ignore_fields: 忽略的字段路径（fnmatch通配），路径用点分隔、列表下标为数字，例：data.token、data.list.*.updateTime
+    :param path: 当前字段路径（递归用）
+    :return: 差异列表，每项：(字段路径, 差异类型, 主环境值, 影子环境值)
+             差异类型：type(类型不同)/value(值不同)/missing_left(主环境缺失)/missing_right(影子环境缺失)
+    """
+    if path and any(fnmatch.fnmatchcase(path, pattern) for pattern in ignore_fields):
+        return []
+    if not _same_type(left, right):
+        return [(path or "$", "type", left, right)]
+    diffs = []
+    if isinstance(left, dict):
+        for key in list(left) + [k for k in right if k not in left]:
+            child = f"{path}.{key}" if path else str(key)
+            if any(fnmatch.fnmatchcase(child, pattern) for pattern in ignore_fields):
+                continue
+            if key not in right:
+                diffs.append((child, "missing_right", left[key], None))
+            elif key not in left:
+                diffs.append((child, "missing_left", None, right[key]))
+            else:
+                diffs.extend(json_diff(left[key], right[key], ignore_fields, child))
+    elif isinstance(left, list):
+        for index in range(max(len(left), len(right))):
+            child = f"{path}.{index}" if path else str(index)
+            if index >= len(right):
+                diffs.append((child, "missing_right", left[index], None))
+            elif index >= len(left):
+                diffs.append((child, "missing_left", None, right[index]))
+            else:
+                diffs.extend(json_diff(left[index], right[index], ignore_fields, child))
+    elif left != right:
+        diffs.append((path or "$", "value", left, right))
+    return diffs
+
+
+class ShadowReport:
+    """影子对比结果汇总（按接口聚合，全局单例 shadow_report）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def reset(self) -> None:
+        """清空汇总（常驻进程多次运行时由conftest在会话开始时调用）"""
+        with self._lock:
+            self.endpoints = {}
+
+    def record(self, endpoint: str, diffs: list, primary_ms, shadow_ms) -> None:
+        """记录一次对比结果（耗时为None表示该侧请求未拿到响应）"""
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {
+                "calls": 0, "mismatches": 0, "fields": Counter(), "primary_ms": [], "shadow_ms": []
+            })
+            stats["calls"] += 1
+            if diffs:
+                stats["mismatches"] += 1
+                stats["fields"].update(diff[0] for diff in diffs)
+            if primary_ms is not None:
+                stats["primary_ms"].append(primary_ms)
+            if shadow_ms is not None:
+                stats["shadow_ms"].append(shadow_ms)
+
+    def export(self) -> dict:
+        """导出汇总（pytest-xdist worker通过workeroutput回传给主进程，Counter转为普通字典）"""
+        with self._lock:
+            return {endpoint: {**stats, "fields": dict(stats["fields"])} for endpoint, stats in self.endpoints.items()}
+
+    def merge(self, data: dict) -> None:
+        """合并worker回传的汇总"""
+        with self._lock:
+            for endpoint, other in data.items():
+                stats = self.endpoints.setdefault(endpoint, {
+                    "calls": 0, "mismatches": 0, "fields": Counter(), "primary_ms": [], "shadow_ms": []
+                })
+                stats["calls"] += other["calls"]
+                stats["mismatches"] += other["mismatches"]
+                stats["fields"].update(other["fields"])
+                stats["primary_ms"].extend(other["primary_ms"])
+                stats["shadow_ms"].extend(other["shadow_ms"])
+
+    def summary_lines(self, top_fields: int = 5) -> list:
+        """生成汇总文本（终端汇总与HTML报告共用）"""
+        def fmt(values, pct):
+            value = percentile(values, pct)
+            return "-" if value is None else f"{value:.1f}ms"
+
+        lines = []
+        for endpoint, stats in sorted(self.endpoints.items()):
+            line = (f"[影子对比] {endpoint}：{stats['calls']}次，不一致{stats['mismatches']}次"
+                    f" | 耗时P50 主{fmt(stats['primary_ms'], 50)}/影子{fmt(stats['shadow_ms'], 50)}"
+                    f" P95 主{fmt(stats['primary_ms'], 95)}/影子{fmt(stats['shadow_ms'], 95)}")
+            if stats["fields"]:
+                fields = "，".join(f"{field}×{count}" for field, count in stats["fields"].most_common(top_fields))
+                line += f" | 差异字段：{fields}"
+            lines.append(line)
+        return lines
+
+
+class ShadowComparator:
+    """影子环境对比器（由BaseRequest.enable_shadow创建，持有影子环境的请求对象和并发线程池）"""
+
+    def __init__(self, client, ignore_fields=None, max_workers: int = 8, timeout: float = None):
+        """
+        :param client: 影子环境的BaseRequest对象
+        :param ignore_fields: 忽略字段列表，默认读取配置 SHADOW.ignore_fields（逗号分隔）
+        :param max_workers: 影子请求/对比线程池大小（主请求在调用线程执行，影子请求和对比在线程池并发执行）
+        :param timeout: 影子结果的等待上限（秒，从提交影子请求开始计），默认同影子请求对象的超时时间
+        """
+        self.client = client
+        self.timeout = timeout if timeout is not None else client.timeout
+        if ignore_fields is None:
+            ignore_fields = [f.strip() for f in read_config("SHADOW", "ignore_fields").split(",") if f.strip()]
+        self.ignore_fields = list(ignore_fields)
+        # 环境相关的请求头覆盖（如两个环境的token不同）
+        self.header_overrides = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+        self._compare_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow-compare")
+
+    @staticmethod
+    def supports(kwargs: dict) -> bool:
+        """判断请求能否安全地重复发送（文件对象、流式请求体/响应只能消费一次，不做影子对比）"""
+        if kwargs.get("stream") or kwargs.get("files"):
+            return False
+        data = kwargs.get("data")
+        return data is None or isinstance(data, (dict, str, bytes))
+
+    def submit(self, method: str, path: str, headers: dict, kwargs: dict):
+        """提交影子请求（沿用调用线程的日志上下文，影子侧日志同样带用例ID）"""
+        shadow_headers = {**headers, **self.header_overrides}
+        shadow_headers[self.client.CORRELATION_HEADER] = f"{headers[self.client.CORRELATION_HEADER]}-shadow"
+        context = contextvars.copy_context()
+        return self._executor.submit(
+            context.run, self._call, method, path, {**kwargs, "headers": shadow_headers}
+        )
+
+    def _call(self, method: str, path: str, kwargs: dict) -> dict:
+        """执行影子请求，异常转为结果（影子侧失败不影响用例）"""
+        try:
+            return self.outcome(response=self.client._request(method, path, **kwargs))
+        except Exception as e:
+            return self.outcome(error=e)
+
+    @staticmethod
+    def outcome(response=None, error=None) -> dict:
+        """
+        统一请求结果：{"status", "body", "elapsed_ms", "error"}
+        HTTP错误（状态码>=400）时从异常链中取回响应，仍参与对比
+        """
+        cause = error
+        while response is None and cause is not None:
+            response = getattr(cause, "response", None)
+            cause = cause.__cause__
+        if response is None:
+            return {"status": None, "body": None, "elapsed_ms": None, "error": str(error)}
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        return {"status": response.status_code, "body": body,
+                "elapsed_ms": response.elapsed.total_seconds() * 1000, "error": None}
+
+    def compare_async(self, method: str, path: str, primary: dict, shadow_future, started: float):
+        """
+        在后台线程等待影子请求并对比（用例线程不阻塞），沿用调用线程的日志上下文
+        :param started: 提交影子请求时的time.monotonic()，等待上限从此时开始计
+        :return: 对比任务的Future（结果为差异列表）
+        """
+        remaining = max(self.timeout - (time.monotonic() - started), 0)
+        context = contextvars.copy_context()
+        return self._compare_executor.submit(
+            context.run, self.compare, method, path, primary, shadow_future, remaining
+        )
+
+    def compare(self, method: str, path: str, primary: dict, shadow_future, timeout: float = None) -> list:
+        """
+        等待影子请求完成（最多timeout秒，None表示使用self.timeout），对比两侧结果并写入汇总
+        影子请求超时记为 $error 差异（类型timeout），不再比较状态码和响应体
+        """
+        diffs = []
+        try:
+            shadow = shadow_future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            shadow = {"status": None, "body": None, "elapsed_ms": None, "error": f"影子请求超时（>{self.timeout}s）"}
+            diffs.append(("$error", "timeout", primary["error"], shadow["error"]))
+        else:
+            # 错误信息含各自环境的URL，只比较"是否失败"
+            if bool(primary["error"]) != bool(shadow["error"]):
+                diffs.append(("$error", "value", primary["error"], shadow["error"]))
+            if primary["status"] != shadow["status"]:
+                diffs.append(("$status", "value", primary["status"], shadow["status"]))
+            diffs.extend(json_diff(primary["body"], shadow["body"], self.ignore_fields))
+        endpoint = f"{method.upper()} {path}"
+        shadow_report.record(endpoint, diffs, primary["elapsed_ms"], shadow["elapsed_ms"])
+        if diffs:
+            details = "；".join(f"{field}[{kind}] 主={json.dumps(left, ensure_ascii=False, default=str)[:200]}"
+                               f" 影子={json.dumps(right, ensure_ascii=False, default=str)[:200]}"
+                               for field, kind, left, right in diffs[:10])
+            logger.warning(f"影子对比不一致：{endpoint}，共{len(diffs)}处：{details}")
+        else:
+            logger.info(f"影子对比一致：{endpoint}")
+        return diffs
+
+    def close(self) -> None:
+        """等待进行中的影子请求和对比结束（对比等待有上限，不会无限挂起）"""
+        self._compare_executor.shutdown(wait=True)
+        self._executor.shutdown(wait=True)
+
+
+# 全局影子对比汇总
+shadow_report = ShadowReport()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+【服务端日志/指标后台采集】
+文件作用：
+1. 复用 SSHOperation 的SSH连接，在同一条连接上开启多个持久通道：
+   - 日志通道：tail -F 远程日志文件，实时接收新增日志
+   - 指标通道：持续输出型采样命令（默认 vmstat -n 1，每秒一行）
+2. 单个后台线程用 select 多路读取全部通道，不阻塞用例线程
+3. 每行按本地接收时间打时间戳，按时间分块写入 gzip 文件：<输出目录>/<数据流>/<分块起始毫秒>.gz
+   查询某个时间窗口时只需读取覆盖该窗口的分块
+4. correlate() 把客户端请求耗时样本（utils.perf_util）与同时间窗口的服务端日志/指标对齐
+使用方式：
+   with SSHCapture() as capture:          # 或使用conftest夹具 server_capture
+       request_util.get(...)
+   capture.correlate(latency_recorder.samples)
+"""
+import os
+import re
+import time
+import zlib
+import bisect
+import select
+import threading
+from core.ssh_operation import ssh_util
+from utils.common_util import read_config
+from utils.path_util import REPORT_PATH
+from utils.log_util import logger
+
+
+class _ChunkWriter:
+    """单个数据流的分块写入器（gzip，按时长切分，文件名为分块起始毫秒时间戳）"""
+
+    def __init__(self, stream_dir: str, chunk_seconds: int):
+        self.stream_dir = stream_dir
+        self.chunk_seconds = chunk_seconds
+        self._file = None
+        self._compressor = None
+        self._chunk_start = None
+        os.makedirs(stream_dir, exist_ok=True)
+
+    def write(self, timestamp: float, line: str) -> None:
+        if self._file is None or timestamp - self._chunk_start >= self.chunk_seconds:
+            self.close()
+            self._chunk_start = timestamp
+            self._file = open(os.path.join(self.stream_dir, f"{int(timestamp * 1000)}.gz"), "wb")
+            self._compressor = zlib.compressobj(wbits=31)
+        self._file.write(self._compressor.compress(f"{timestamp:.3f}\t{line}\n".encode("utf-8")))
+
+    def flush(self):
+        """
+        同步刷新（未关闭的分块也能被读取到已写入的内容）
+        :return: (当前分块文件名, 同步点字节偏移)；无打开的分块时返回None
+                 同步点之前的压缩数据恰好是完整的若干行，读取方只解压到该偏移，不受后台线程继续追加的影响
+        """
+        if self._file:
+            self._file.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+            self._file.flush()
+            return os.path.basename(self._file.name), self._file.tell()
+        return None
+
+    def close(self) -> None:
+        if self._file:
+            self._file.write(self._compressor.flush())
+            self._file.close()
+            self._file = None
+
+
+class SSHCapture:
+    """服务端日志/指标后台采集器（支持with语句自动启停）"""
+
+    def __init__(self, ssh=None, log_files: list = None, metric_commands: dict = None,
+                 output_dir: str = None, chunk_seconds: int = None):
+        """
+        :param ssh: SSHOperation对象，默认全局ssh_util（未连接时自动连接）
+        :param log_files: 远程日志文件路径列表，默认读取配置 SSH.capture_log_files
+        :param metric_commands: 指标采样命令字典，格式：{"vmstat": "vmstat -n 1"}，默认读取配置 SSH.capture_metric_command
+        :param output_dir: 分块输出目录，默认 reports/ssh_capture/<启动时间>/
+        :param chunk_seconds: 每个分块覆盖的时长（秒），默认读取配置 SSH.capture_chunk_seconds
+        """
+        self.ssh = ssh or ssh_util
+        if log_files is None:
+            log_files = [f.strip() for f in read_config("SSH", "capture_log_files").split(",") if f.strip()]
+        if metric_commands is None:
+            metric_command = read_config("SSH", "capture_metric_command")
+            metric_commands = {metric_command.split()[0]: metric_command} if metric_command else {}
+        self.commands = {f"log_{os.path.basename(path)}": f"tail -n 0 -F {path}" for path in log_files}
+        self.commands.update({f"metric_{name}": command for name, command in metric_commands.items()})
+        self.output_dir = output_dir or os.path.join(REPORT_PATH, "ssh_capture", time.strftime("%Y%m%d_%H%M%S"))
+        self.chunk_seconds = chunk_seconds or int(read_config("SSH", "capture_chunk_seconds"))
+        self._channels = {}
+        self._writers = {}
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        """数据流名称转为安全的目录名"""
+        return re.sub(r"[^\w.-]", "_", name)
+
+    def start(self) -> "SSHCapture":
+        """开启全部采集通道并启动后台读取线程"""
+        if not self.ssh.ssh_client:
+            self.ssh.connect()
+        transport = self.ssh.ssh_client.get_transport()
+        for name, command in self.commands.items():
+            channel = transport.open_session()
+            # 分配伪终端：关闭通道时远程tail/vmstat随之退出，不残留进程
+            channel.get_pty()
+            channel.exec_command(command)
+            stream = self._safe_name(name)
+            self._channels[channel] = stream
+            self._writers[stream] = _ChunkWriter(os.path.join(self.output_dir, stream), self.chunk_seconds)
+            self._buffers[channel] = b""
+            logger.info(f"SSH后台采集通道已开启：{stream} → {command}")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._read_loop, name="ssh-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _read_loop(self) -> None:
+        """后台线程：select多路读取全部通道，按行打时间戳写入分块（单个通道出错只停止该通道）"""
+        while not self._stop_event.is_set() and self._channels:
+            try:
+                readable, _, _ = select.select(list(self._channels), [], [], 0.5)
+            except Exception as e:
+                logger.error(f"SSH后台采集异常退出：select失败，错误信息：{str(e)}")
+                return
+            now = time.time()
+            for channel in readable:
+                stream = self._channels[channel]
+                try:
+                    data = channel.recv(65536)
+                    if not data:
+                        logger.warning(f"SSH后台采集通道已结束：{stream}")
+                        del self._channels[channel]
+                        continue
+                    lines = (self._buffers[channel] + data).split(b"\n")
+                    self._buffers[channel] = lines.pop()
+                    with self._lock:
+                        for line in lines:
+                            self._writers[stream].write(now, line.rstrip(b"\r").decode("utf-8", "replace"))
+                except Exception as e:
+                    logger.error(f"SSH后台采集通道异常，已停止该通道：{stream}，错误信息：{str(e)}")
+                    self._drop_channel(channel)
+
+    def _drop_channel(self, channel) -> None:
+        """移除并关闭单个通道（关闭失败只忽略，其余通道继续采集）"""
+        self._channels.pop(channel, None)
+        self._buffers.pop(channel, None)
+        try:
+            channel.close()
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        """停止采集：结束后台线程、关闭通道、封口全部分块文件"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        for channel in list(self._channels):
+            channel.close()
+        self._channels.clear()
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+        logger.info(f"SSH后台采集已停止，数据目录：{self.output_dir}")
+
+    def streams(self) -> list:
+        """已采集的数据流名称列表"""
+        return sorted(self._writers)
+
+    def read(self, stream: str, start_time: float = None, end_time: float = None) -> list:
+        """
+        读取某个数据流在时间窗口内的数据（采集中也可调用）
+        :param stream: 数据流名称（见streams()）
+        :param start_time: 窗口起点（epoch秒），None表示不限
+        :param end_time: 窗口终点（epoch秒），None表示不限
+        :return: [(时间戳, 行内容), ...]
+        """
+        stream_dir = os.path.join(self.output_dir, stream)
+        if not os.path.isdir(stream_dir):
+            return []
+        # 加锁期间：同步刷新当前分块并记下同步点偏移、列出分块；解压在锁外进行，后台线程可继续写入
+        live_chunk = None
+        with self._lock:
+            if stream in self._writers:
+                live_chunk = self._writers[stream].flush()
+            chunk_starts = sorted(int(name[:-3]) for name in os.listdir(stream_dir) if name.endswith(".gz"))
+        result = []
+        for index, chunk_start in enumerate(chunk_starts):
+            # 分块文件名即起始毫秒时间戳：跳过与窗口无交集的分块，不解压
+            chunk_end = chunk_starts[index + 1] if index + 1 < len(chunk_starts) else float("inf")
+            if (end_time is not None and chunk_start > end_time * 1000) or \
+                    (start_time is not None and chunk_end < start_time * 1000):
+                continue
+            file_name = f"{chunk_start}.gz"
+            with open(os.path.join(stream_dir, file_name), "rb") as f:
+                # 采集中的当前分块只读到同步点（之后的内容可能是半行压缩数据）；decompressobj可解压未封口的分块
+                size = live_chunk[1] if live_chunk and live_chunk[0] == file_name else -1
+                text = zlib.decompressobj(wbits=31).decompress(f.read(size)).decode("utf-8", "replace")
+            for row in text.splitlines():
+                timestamp, _, line = row.partition("\t")
+                timestamp = float(timestamp)
+                if (start_time is None or timestamp >= start_time) and (end_time is None or timestamp <= end_time):
+                    result.append((timestamp, line))
+        return result
+
+    def correlate(self, samples: list, margin: float = 1.0) -> list:
+        """
+        将客户端请求耗时样本与服务端数据按时间对齐
+        :param samples: utils.perf_util.latency_recorder.samples（含start_time/end_time）
+        :param margin: 时间窗口前后扩展秒数（覆盖两端时钟偏差与采样间隔）
+        :return: 每个请求一项：{"endpoint", "test_id", "elapsed_ms", "start_time", "end_time", "server": {数据流: [(时间戳, 行), ...]}}
+        """
+        if not samples:
+            return []
+        # 每个数据流只读取一次（覆盖全部样本的时间范围），再按样本窗口二分切片
+        begin = min(s["start_time"] for s in samples) - margin
+        end = max(s["end_time"] for s in samples) + margin
+        stream_rows = {stream: self.read(stream, begin, end) for stream in self.streams()}
+        stream_times = {stream: [row[0] for row in rows] for stream, rows in stream_rows.items()}
+        result = []
+        for sample in samples:
+            low, high = sample["start_time"] - margin, sample["end_time"] + margin
+            server = {}
+            for stream, rows in stream_rows.items():
+                times = stream_times[stream]
+                server[stream] = rows[bisect.bisect_left(times, low):bisect.bisect_right(times, high)]
+            result.append({
+                "endpoint": sample["endpoint"],
+                "test_id": sample["test_id"],
+                "elapsed_ms": sample["elapsed_ms"],
+                "start_time": sample["start_time"],
+                "end_time": sample["end_time"],
+                "server": server
+            })
+        return result
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
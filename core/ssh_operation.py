@@ -11,7 +11,7 @@
 """
 import paramiko
 from utils.log_util import logger
-from utils.common_util import common_util
+from utils.common_util import read_config
 
 
 class SSHOperation:
@@ -19,10 +19,10 @@ class SSHOperation:
 
     def __init__(self):
         # 读取SSH配置
-        self.ssh_host = common_util.read_config("SSH", "ssh_host")
-        self.ssh_port = int(common_util.read_config("SSH", "ssh_port"))
-        self.ssh_user = common_util.read_config("SSH", "ssh_user")
-        self.ssh_password = common_util.read_config("SSH", "ssh_password")
+        self.ssh_host = read_config("SSH", "ssh_host")
+        self.ssh_port = int(read_config("SSH", "ssh_port"))
+        self.ssh_user = read_config("SSH", "ssh_user")
+        self.ssh_password = read_config("SSH", "ssh_password")
         # SSH客户端对象
         self.ssh_client = None
 
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+【登录token缓存】
+文件作用：
+1. 按 (环境base_url, 账号) 缓存登录token，有效期内同一账号只登录一次
+2. 缓存放在core包中：run_daemon.py 常驻进程只会重载 test_cases/、data/、conftest.py，
+   修改用例后重跑仍能复用已缓存的token
+使用方式：
+   token = token_cache.get((base_url, account), lambda: 登录并返回token)   # conftest夹具 login_token 已封装
+"""
+import time
+import threading
+from utils.log_util import logger
+from utils.common_util import read_config
+
+
+class TokenCache:
+    """登录token缓存（全局单例 token_cache，进程内跨多次pytest运行共享）"""
+
+    def __init__(self, ttl: int = None):
+        """
+        :param ttl: 缓存有效期（秒），超过后重新登录；不传则读取配置 AUTH.token_ttl
+        """
+        self.ttl = ttl if ttl is not None else int(read_config("AUTH", "token_ttl"))
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def get(self, key: tuple, fetch) -> str:
+        """
+        获取token：缓存有效则直接返回，否则调用fetch登录并缓存
+        :param key: 缓存键，例：(base_url, account)
+        :param fetch: 无参可调用对象，返回新token
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.time() - cached[1] < self.ttl:
+                logger.info(f"复用缓存的登录token：{key}")
+                return cached[0]
+            token = fetch()
+            self._cache[key] = (token, time.time())
+            return token
+
+    def invalidate(self, key: tuple = None) -> None:
+        """使缓存失效（token被服务端提前作废时调用），不传key则清空全部"""
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+
+# 全局token缓存
+token_cache = TokenCache()
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+【常驻测试运行进程（热启动重跑）】
+文件作用：
+1. 常驻进程预先导入 requests/paramiko/pymysql、core、utils、conftest，日志只初始化一次
+2. 连接复用：HTTP连接池（BaseRequest.session）、数据库常驻连接（db_util.keep_alive）、SSH连接、登录token缓存（core.token_cache）
+3. 通过Unix域套接字（权限0600，仅当前用户可连接）接收运行请求，在进程内执行 pytest.main，输出实时回传给客户端；
+   不支持AF_UNIX的平台退回本机TCP端口，并生成随机token文件（权限0600），请求须携带该token
+4. 每次运行前检查 test_cases/、data/、conftest.py 的修改时间，有变化则卸载对应模块，由pytest重新导入
+   （core/、utils/ 变化需重启常驻进程，会给出提示）
+5. 每次运行返回启动耗时：模块重载耗时、pytest启动到第一个用例开始的耗时、总耗时
+说明：同一进程内的运行串行执行（全局请求对象、数据库连接等为进程级共享状态）；
+     常驻进程可执行任意测试代码，因此只接受当前用户的连接，格式错误/认证失败的请求直接拒绝
+使用方式（项目根目录执行）：
+   python run_daemon.py [--socket 路径] [--port 8765] serve [--prewarm]   # 启动常驻进程（--port仅TCP退回模式使用）
+   python run_daemon.py run -- test_cases/test_login.py -v          # 提交一次运行（--之后为pytest参数）
+   python run_daemon.py stop                                        # 停止常驻进程
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import socket
+import hashlib
+import secrets
+import argparse
+import threading
+import socketserver
+
+DEFAULT_PORT = 8765
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+# 是否支持Unix域套接字（不支持时退回本机TCP + token认证）
+HAS_UNIX_SOCKET = hasattr(socketserver, "ThreadingUnixStreamServer")
+# 默认套接字路径：优先 $XDG_RUNTIME_DIR（按项目路径区分），否则放在项目 reports/ 下
+DEFAULT_SOCKET = (
+    os.path.join(os.environ["XDG_RUNTIME_DIR"],
+                 f"api_test_daemon_{hashlib.md5(PROJECT_ROOT.encode('utf-8')).hexdigest()[:8]}.sock")
+    if os.environ.get("XDG_RUNTIME_DIR") else os.path.join(PROJECT_ROOT, "reports", "run_daemon.sock")
+)
+# TCP退回模式的认证文件：{"port": 端口, "token": 随机token}
+TOKEN_FILE = os.path.join(PROJECT_ROOT, "reports", "run_daemon.token")
+# 每次运行前检查变化并重新导入的目录/文件（相对项目根目录）
+RELOAD_DIRS = ("test_cases", "data")
+RELOAD_FILES = ("conftest.py",)
+# 变化后需重启常驻进程的目录（全局单例所在，热重载不安全）
+RESTART_DIRS = ("core", "utils")
+
+
+def _snapshot(dirs, files=()) -> dict:
+    """采集.py文件修改时间快照：{绝对路径: mtime_ns}"""
+    result = {}
+    for name in dirs:
+        for root, _, file_names in os.walk(os.path.join(PROJECT_ROOT, name)):
+            for file_name in file_names:
+                if file_name.endswith(".py"):
+                    path = os.path.join(root, file_name)
+                    result[path] = os.stat(path).st_mtime_ns
+    for name in files:
+        path = os.path.join(PROJECT_ROOT, name)
+        if os.path.exists(path):
+            result[path] = os.stat(path).st_mtime_ns
+    return result
+
+
+class _SocketWriter:
+    """把pytest输出按JSON行实时发送给客户端（替换sys.stdout/sys.stderr使用）"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data):
+        if data:
+            self.wfile.write((json.dumps({"type": "output", "data": data}, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def isatty(self):
+        return False
+
+
+class _TimingPlugin:
+    """pytest插件：记录第一个用例开始的时间点（衡量每次运行的启动耗时）"""
+
+    def __init__(self):
+        self.first_test_at = None
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        if self.first_test_at is None:
+            self.first_test_at = time.perf_counter()
+
+
+class WarmRunner:
+    """常驻运行器：预热依赖，串行执行pytest，按需重载测试/数据模块"""
+
+    def __init__(self, prewarm: bool = False):
+        start = time.perf_counter()
+        os.chdir(PROJECT_ROOT)
+        if PROJECT_ROOT not in sys.path:
+            sys.path.insert(0, PROJECT_ROOT)
+        # 预先导入重量级依赖和框架模块（日志、配置、全局请求对象等只初始化一次）
+        import pytest
+        import requests
+        import paramiko
+        import pymysql
+        import conftest
+        from core.db_operation import db_util
+        from utils.log_util import logger
+        self.pytest = pytest
+        self.db_util = db_util
+        self.logger = logger
+        db_util.keep_alive = True
+        if prewarm:
+            self._prewarm()
+        self._lock = threading.Lock()
+        self._reload_snapshot = _snapshot(RELOAD_DIRS, RELOAD_FILES)
+        self._restart_snapshot = _snapshot(RESTART_DIRS)
+        self.logger.info(f"常驻进程预热完成，耗时{time.perf_counter() - start:.2f}s")
+
+    def _prewarm(self) -> None:
+        """预先建立数据库/SSH连接（失败只记录，不影响常驻进程启动）"""
+        from core.ssh_operation import ssh_util
+        for name, connect in (("数据库", self.db_util.connect), ("SSH", ssh_util.connect)):
+            try:
+                connect()
+            except Exception as e:
+                self.logger.warning(f"预建{name}连接失败（运行时将按需连接）：{str(e)}")
+
+    def _reload_changed(self) -> list:
+        """
+        卸载有变化的测试/数据模块（任一变化即卸载全部测试/数据模块及conftest，避免用例持有旧数据引用）
+        :return: 有变化的文件列表
+        """
+        current = _snapshot(RELOAD_DIRS, RELOAD_FILES)
+        changed = sorted(path for path in set(current) | set(self._reload_snapshot)
+                         if current.get(path) != self._reload_snapshot.get(path))
+        self._reload_snapshot = current
+        if changed:
+            prefixes = tuple(os.path.join(PROJECT_ROOT, name) + os.sep for name in RELOAD_DIRS)
+            conftest_files = tuple(os.path.join(PROJECT_ROOT, name) for name in RELOAD_FILES)
+            for module_name, module in list(sys.modules.items()):
+                module_file = os.path.abspath(getattr(module, "__file__", None) or "")
+                if module_file.startswith(prefixes) or module_file in conftest_files:
+                    del sys.modules[module_name]
+        return changed
+
+    def run(self, args: list, out) -> dict:
+        """
+        执行一次pytest（串行）
+        :param args: pytest命令行参数
+        :param out: 输出流（pytest终端输出写入此对象）
+        :return: {"exit_code", "changed", "timing": {"reload_s", "startup_s", "total_s"}}
+        """
+        with self._lock:
+            start = time.perf_counter()
+            changed = self._reload_changed()
+            reload_done = time.perf_counter()
+            if _snapshot(RESTART_DIRS) != self._restart_snapshot:
+                out.write("提示：core/ 或 utils/ 有修改，常驻进程中仍是旧代码，请重启（python run_daemon.py stop 后重新serve）\n")
+            timing_plugin = _TimingPlugin()
+            saved_streams = sys.stdout, sys.stderr
+            sys.stdout = sys.stderr = out
+            try:
+                exit_code = int(self.pytest.main(list(args), plugins=[timing_plugin]))
+            finally:
+                sys.stdout, sys.stderr = saved_streams
+            end = time.perf_counter()
+            first_test_at = timing_plugin.first_test_at or end
+            timing = {
+                "reload_s": round(reload_done - start, 4),
+                "startup_s": round(first_test_at - start, 4),
+                "total_s": round(end - start, 4),
+            }
+            self.logger.info(f"常驻进程运行完成：参数={args}，退出码={exit_code}，耗时={timing}，重载文件={changed}")
+            return {"exit_code": exit_code, "changed": changed, "timing": timing}
+
+    def shutdown(self) -> None:
+        self.db_util.close(force=True)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    请求格式（JSON行）：{"action": "run", "args": [...]} 或 {"action": "stop"}
+    TCP退回模式下请求须带 "token"；空行、非JSON对象、认证失败、未知动作均返回错误结果（退出码2）
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            self._reject("请求格式错误：应为一行JSON对象")
+            return
+        token = self.server.token
+        if token is not None and not hmac.compare_digest(str(request.get("token", "")).encode("utf-8"),
+                                                         token.encode("utf-8")):
+            self._reject("认证失败：token不匹配")
+            return
+        action, args = request.get("action"), request.get("args", [])
+        if action == "stop":
+            self._send({"type": "result", "exit_code": 0, "message": "常驻进程已停止"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if action != "run" or not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            self._reject(f"不支持的请求：action={action!r}，args须为字符串列表")
+            return
+        result = self.server.runner.run(args, _SocketWriter(self.wfile))
+        self._send({"type": "result", **result})
+
+    def _reject(self, message: str) -> None:
+        self.server.runner.logger.warning(f"常驻进程拒绝请求：{message}")
+        self._send({"type": "result", "exit_code": 2, "message": message})
+
+    def _send(self, message: dict) -> None:
+        self.wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+if HAS_UNIX_SOCKET:
+    class _UnixDaemonServer(socketserver.ThreadingUnixStreamServer):
+        """常驻进程服务端（Unix域套接字，靠文件权限限制为当前用户）"""
+        daemon_threads = True
+
+
+class _TCPDaemonServer(socketserver.ThreadingTCPServer):
+    """常驻进程服务端（TCP退回模式，重启时可立即复用端口）"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """套接字文件已存在：能连上说明常驻进程在运行，报错；连不上则是上次异常退出的残留，删除"""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"常驻进程已在运行：{socket_path}")
+
+
+def _write_token_file(port: int, token: str) -> None:
+    """写入TCP退回模式的认证文件（创建时即为0600，不存在可被他人读取的窗口）"""
+    os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
+    if os.path.exists(TOKEN_FILE):
+        os.remove(TOKEN_FILE)
+    fd = os.open(TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"port": port, "token": token}, f)
+
+
+def create_server(socket_path: str = None, port: int = DEFAULT_PORT) -> socketserver.BaseServer:
+    """
+    创建常驻进程服务端（未绑定runner，调用方设置 server.runner）
+    :param socket_path: Unix域套接字路径，默认 DEFAULT_SOCKET
+    :param port: TCP退回模式的本机端口（0为随机端口，实际端口写入token文件）
+    :return: 服务端对象；server.token 为TCP退回模式的认证token，Unix域套接字模式为None
+    """
+    if HAS_UNIX_SOCKET:
+        socket_path = socket_path or DEFAULT_SOCKET
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        _remove_stale_socket(socket_path)
+        # bind按umask创建套接字文件：先收紧umask，避免创建后到chmod之间被他人连接
+        old_umask = os.umask(0o177)
+        try:
+            server = _UnixDaemonServer(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(socket_path, 0o600)
+        server.token = None
+        return server
+    server = _TCPDaemonServer(("127.0.0.1", port), _RequestHandler)
+    server.token = secrets.token_hex(32)
+    _write_token_file(server.server_address[1], server.token)
+    return server
+
+
+def remove_server_files(server) -> None:
+    """删除套接字文件/token文件（服务端关闭后调用）"""
+    path = server.server_address if server.token is None else TOKEN_FILE
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def serve(prewarm: bool, socket_path: str = None, port: int = DEFAULT_PORT) -> None:
+    """启动常驻进程（Unix域套接字；不支持时退回仅监听本机地址的TCP端口+token认证）"""
+    runner = WarmRunner(prewarm=prewarm)
+    with create_server(socket_path, port) as server:
+        server.runner = runner
+        if server.token is None:
+            print(f"常驻测试进程已启动：{server.server_address}")
+        else:
+            print(f"常驻测试进程已启动：127.0.0.1:{server.server_address[1]}（认证文件：{TOKEN_FILE}）")
+        try:
+            server.serve_forever()
+        finally:
+            remove_server_files(server)
+            runner.shutdown()
+
+
+def _connect(socket_path: str = None):
+    """连接常驻进程，返回 (连接, token)；TCP退回模式从token文件读取端口和token"""
+    if HAS_UNIX_SOCKET:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(socket_path or DEFAULT_SOCKET)
+        except OSError:
+            conn.close()
+            raise
+        return conn, None
+    with open(TOKEN_FILE, encoding="utf-8") as f:
+        info = json.load(f)
+    return socket.create_connection(("127.0.0.1", info["port"])), info["token"]
+
+
+def submit(request: dict, socket_path: str = None) -> int:
+    """客户端：发送请求，实时打印输出，返回pytest退出码"""
+    try:
+        conn, token = _connect(socket_path)
+    except (OSError, ValueError, KeyError):
+        print("常驻进程未启动，请先执行：python run_daemon.py serve")
+        return 2
+    if token is not None:
+        request = {**request, "token": token}
+    with conn, conn.makefile("rwb") as stream:
+        stream.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        stream.flush()
+        for line in stream:
+            message = json.loads(line.decode("utf-8"))
+            if message["type"] == "output":
+                sys.stdout.write(message["data"])
+                continue
+            if "timing" in message:
+                timing = message["timing"]
+                print(f"\n[常驻进程] 模块重载{timing['reload_s']:.3f}s，启动{timing['startup_s']:.3f}s，"
+                      f"总耗时{timing['total_s']:.3f}s，重载文件{len(message['changed'])}个")
+            else:
+                print(message.get("message", ""))
+            return message["exit_code"]
+    return 2
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="常驻pytest运行进程（热启动重跑）")
+    parser.add_argument("--socket", default=None, help=f"Unix域套接字路径（默认{DEFAULT_SOCKET}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="本机监听端口（仅不支持AF_UNIX时的TCP退回模式）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="启动常驻进程")
+    serve_parser.add_argument("--prewarm", action="store_true", help="启动时预建数据库/SSH连接")
+    run_parser = sub.add_parser("run", help="提交一次运行（--之后为pytest参数）")
+    run_parser.add_argument("pytest_args", nargs=argparse.REMAINDER)
+    sub.add_parser("stop", help="停止常驻进程")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.prewarm, args.socket, args.port)
+        return 0
+    if args.command == "stop":
+        return submit({"action": "stop"}, args.socket)
+    pytest_args = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    return submit({"action": "run", "args": pytest_args or ["test_cases/"]}, args.socket)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+BaseRequest 流式上传/下载测试用例（本地桩服务，不依赖测试环境）
+覆盖：各类数据源分块上传后服务端收到的内容与校验值、下载校验值、
+HTTP错误时关闭流式响应且不产生文件、下载中断时删除不完整文件
+"""
+import io
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from requests.exceptions import RequestException
+from core.base_request import BaseRequest
+from utils.common_util import md5_encrypt
+from benchmarks.stub_server import StubServer, USER_INFO_PATH, build_body
+
+
+@pytest.fixture(scope="module")
+def stub_client():
+    """指向本地桩服务的请求对象（不记录耗时样本，避免写入历史基线）"""
+    with StubServer() as server:
+        client = BaseRequest(timeout=5, retry_config={"max_retries": 1, "delay": 0})
+        client.base_url = server.base_url
+        client.record_latency = False
+        yield client
+
+
+class ChunkedEchoHandler(BaseHTTPRequestHandler):
+    """上传桩：按chunked编码读完请求体，响应体返回收到内容的MD5，响应头X-Received-Size返回字节数"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        hasher, size = hashlib.md5(), 0
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                chunk_size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if chunk_size == 0:
+                    # 读完结尾的空行（无trailer），保证keep-alive连接可复用
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunk = self.rfile.read(chunk_size)
+                self.rfile.readline()
+                hasher.update(chunk)
+                size += len(chunk)
+        else:
+            chunk = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            hasher.update(chunk)
+            size = len(chunk)
+        body = hasher.hexdigest().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Received-Size", str(size))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PUT = do_POST
+
+    def log_message(self, format, *args):
+        """关闭访问日志"""
+
+
+@pytest.fixture(scope="module")
+def upload_client():
+    """指向上传桩的请求对象（不记录耗时样本）"""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChunkedEchoHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    client = BaseRequest(timeout=5, retry_config={"max_retries": 1, "delay": 0})
+    client.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    client.record_latency = False
+    yield client
+    httpd.shutdown()
+    httpd.server_close()
+
+
+UPLOAD_CONTENT = bytes(range(256)) * 1000
+
+
+@pytest.mark.parametrize("make_source", [
+    lambda path: UPLOAD_CONTENT,
+    lambda path: bytearray(UPLOAD_CONTENT),
+    lambda path: memoryview(UPLOAD_CONTENT),
+    lambda path: (UPLOAD_CONTENT[i:i + 10000] for i in range(0, len(UPLOAD_CONTENT), 10000)),
+    lambda path: io.BytesIO(UPLOAD_CONTENT),
+    lambda path: str(path),
+], ids=["bytes", "bytearray", "memoryview", "generator", "file_object", "file_path"])
+def test_upload_stream_sources(upload_client, tmp_path, make_source):
+    """各类数据源分块上传：服务端收到的内容完整，本地校验值与服务端一致"""
+    file_path = tmp_path / "upload.bin"
+    file_path.write_bytes(UPLOAD_CONTENT)
+    response, checksum = upload_client.upload_stream("/api/v1/import", make_source(file_path), chunk_size=8192)
+    assert response.status_code == 200
+    assert response.headers["X-Received-Size"] == str(len(UPLOAD_CONTENT))
+    assert response.text == checksum["md5"] == md5_encrypt(UPLOAD_CONTENT)
+    assert checksum["sha256"] == hashlib.sha256(UPLOAD_CONTENT).hexdigest()
+    assert checksum["size"] == len(UPLOAD_CONTENT)
+
+
+def test_download_stream_checksum(stub_client, tmp_path):
+    """流式下载：保存文件内容、回调分块、校验值与响应体一致"""
+    save_path = tmp_path / "user_info.json"
+    chunks = []
+    response, checksum = stub_client.download_stream(
+        USER_INFO_PATH, save_path=str(save_path), callback=chunks.append, chunk_size=1024, params={"size": 5000}
+    )
+    expected = build_body(USER_INFO_PATH, 5000)
+    assert response.status_code == 200
+    assert save_path.read_bytes() == expected == b"".join(chunks)
+    assert checksum["md5"] == md5_encrypt(expected)
+    assert checksum["size"] == len(expected)
+
+
+def test_download_stream_http_error_closes_response(stub_client, tmp_path):
+    """状态码>=400：抛出异常，流式响应已关闭（连接归还连接池），不创建保存文件"""
+    save_path = tmp_path / "missing.bin"
+    with pytest.raises(RequestException) as exc_info:
+        stub_client.download_stream("/not/exists", save_path=str(save_path))
+    response = exc_info.value.__cause__.response
+    assert response.status_code == 404
+    assert response.raw.closed
+    assert not save_path.exists()
+
+
+def test_download_stream_interrupted_removes_partial_file(stub_client, tmp_path):
+    """下载中途失败：异常向上抛出，不完整的保存文件被删除"""
+    save_path = tmp_path / "partial.json"
+
+    def failing_callback(chunk):
+        raise IOError("磁盘已满")
+
+    with pytest.raises(IOError):
+        stub_client.download_stream(USER_INFO_PATH, save_path=str(save_path), callback=failing_callback,
+                                    chunk_size=1024, params={"size": 5000})
+    assert not save_path.exists()
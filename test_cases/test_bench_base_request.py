@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+框架开销基准工具测试用例（benchmarks.bench_base_request）
+覆盖：compare_with_baseline 的相对阈值、overhead_ms 噪声下限、基线缺失组合/指标；
+isolated_logging 基准期间日志写临时目录、结束后恢复原处理器
+"""
+import os
+import logging
+from logging.handlers import RotatingFileHandler
+from benchmarks.bench_base_request import compare_with_baseline, isolated_logging
+from utils.log_util import logger
+
+KEY = "GET /api/v1/user/info|size=256|c=1"
+
+
+def case(**framework) -> dict:
+    return {"raw": {"rps": 1000.0, "median_ms": 1.0}, "framework": framework}
+
+
+def test_compare_within_threshold():
+    """变差不超过阈值：不判回归（rps变大为变好）"""
+    baseline = {KEY: case(rps=1000.0, median_ms=2.0, overhead_ms=1.0, alloc_kb=20.0)}
+    results = {KEY: case(rps=850.0, median_ms=2.3, overhead_ms=1.1, alloc_kb=23.0)}
+    assert compare_with_baseline(results, baseline, threshold=0.2, min_overhead_ms=0.5) == []
+
+
+def test_compare_relative_threshold():
+    """超过相对阈值：rps下降、耗时/分配上升均判为回归"""
+    baseline = {KEY: case(rps=1000.0, median_ms=2.0, alloc_kb=20.0)}
+    results = {KEY: case(rps=700.0, median_ms=3.0, alloc_kb=30.0)}
+    regressions = compare_with_baseline(results, baseline, threshold=0.2, min_overhead_ms=0.5)
+    assert [line.split("：")[0] for line in regressions] == [f"{KEY} rps", f"{KEY} median_ms", f"{KEY} alloc_kb"]
+    assert "（-30.0%）" in regressions[0]
+
+
+def test_compare_overhead_noise_floor():
+    """overhead_ms：相对变化超过阈值但绝对变化低于噪声下限，不判回归；超过下限判回归"""
+    baseline = {KEY: case(overhead_ms=0.2)}
+    assert compare_with_baseline({KEY: case(overhead_ms=0.6)}, baseline, 0.2, min_overhead_ms=0.5) == []
+    regressions = compare_with_baseline({KEY: case(overhead_ms=0.8)}, baseline, 0.2, min_overhead_ms=0.5)
+    assert len(regressions) == 1 and regressions[0].startswith(f"{KEY} overhead_ms")
+
+
+def test_compare_missing_keys():
+    """基线中没有的组合、任一侧缺失的指标、基线值为0的指标：跳过"""
+    baseline = {KEY: case(rps=1000.0, median_ms=0.0)}
+    results = {
+        KEY: case(rps=1000.0, median_ms=5.0, overhead_ms=9.0),
+        "GET /api/v1/user/info|size=256|c=4": case(rps=1.0),
+    }
+    assert compare_with_baseline(results, baseline, threshold=0.2, min_overhead_ms=0.5) == []
+
+
+def test_isolated_logging_writes_temp_dir():
+    """基准期间：文件日志写入临时目录，不写项目日志、不输出控制台；结束后恢复原处理器并删除临时目录"""
+    original_handlers = list(logger.handlers)
+    project_files = [h.baseFilename for h in original_handlers if isinstance(h, RotatingFileHandler)]
+    sizes_before = [os.path.getsize(f) if os.path.exists(f) else 0 for f in project_files]
+    with isolated_logging() as temp_dir:
+        assert not any(type(h) is logging.StreamHandler for h in logger.handlers)
+        handlers = [h for h in logger.handlers if isinstance(h, RotatingFileHandler)]
+        assert handlers and all(h.baseFilename.startswith(temp_dir) for h in handlers)
+        logger.info("基准日志隔离测试")
+        temp_log = handlers[0].baseFilename
+        handlers[0].flush()
+        assert "基准日志隔离测试" in open(temp_log, encoding="utf-8").read()
+    assert set(logger.handlers) == set(original_handlers)
+    assert not os.path.exists(temp_dir)
+    assert [os.path.getsize(f) if os.path.exists(f) else 0 for f in project_files] == sizes_before
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+通用工具类测试用例（utils.common_util 流式摘要部分）
+覆盖：StreamHasher 分块累加、iter_file_chunks 分块读取、md5_encrypt/sha256_encrypt 对
+字符串/bytes/文件对象/生成器输入的一致性（摘要值为公开标准测试向量）
+"""
+import io
+import pytest
+from utils.common_util import StreamHasher, iter_file_chunks, md5_encrypt, sha256_encrypt, file_checksum
+
+# 标准测试向量："abc"的MD5/SHA-256
+ABC_MD5 = "900150983cd24fb0d6963f7d28e17f72"
+ABC_SHA256 = "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+EMPTY_MD5 = "d41d8cd98f00b204e9800998ecf8427e"
+
+
+def test_stream_hasher_chunks_equal_whole():
+    """分块update与整体计算结果一致，size为总字节数，str按utf-8编码"""
+    hasher = StreamHasher()
+    for chunk in (b"a", "b", bytearray(b"c")):
+        hasher.update(chunk)
+    assert hasher.result() == {"md5": ABC_MD5, "sha256": ABC_SHA256, "size": 3}
+    assert hasher.hexdigest("md5") == ABC_MD5
+
+
+def test_iter_file_chunks_path_and_file_object(tmp_path):
+    """文件路径、已打开文件对象均按chunk_size切块，拼接后与原内容一致"""
+    content = bytes(range(256)) * 10
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(content)
+    chunks = list(iter_file_chunks(str(file_path), chunk_size=1000))
+    assert [len(c) for c in chunks] == [1000, 1000, 560]
+    assert b"".join(chunks) == content
+    with open(file_path, "rb") as f:
+        assert b"".join(iter_file_chunks(f, chunk_size=7)) == content
+    assert list(iter_file_chunks(io.BytesIO(b""))) == []
+
+
+@pytest.mark.parametrize("data", [
+    "abc",
+    b"abc",
+    bytearray(b"abc"),
+    memoryview(b"abc"),
+    io.BytesIO(b"abc"),
+    (chunk for chunk in (b"a", b"bc")),
+], ids=["str", "bytes", "bytearray", "memoryview", "file", "generator"])
+def test_md5_sha256_input_types(data):
+    """各类输入的摘要与标准测试向量一致"""
+    if hasattr(data, "read"):
+        assert md5_encrypt(data) == ABC_MD5
+        data.seek(0)
+        assert sha256_encrypt(data) == ABC_SHA256
+    elif hasattr(data, "__next__"):
+        assert md5_encrypt(data) == ABC_MD5
+    else:
+        assert md5_encrypt(data) == ABC_MD5
+        assert sha256_encrypt(data) == ABC_SHA256
+
+
+def test_md5_encrypt_legacy_values():
+    """非字符串/bytes输入保持原有行为：转字符串后计算"""
+    assert md5_encrypt("") == EMPTY_MD5
+    assert md5_encrypt(123) == md5_encrypt("123")
+
+
+def test_file_checksum(tmp_path):
+    """文件校验值（分块读取）与内存计算结果一致"""
+    file_path = tmp_path / "abc.txt"
+    file_path.write_bytes(b"abc")
+    assert file_checksum(str(file_path), chunk_size=1) == {"md5": ABC_MD5, "sha256": ABC_SHA256, "size": 3}
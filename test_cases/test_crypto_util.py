@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+加密签名工具类测试用例（utils.crypto_util）
+已知结果均由 openssl 独立生成，例：
+   printf 'Test@123456' | openssl enc -aes-128-ecb -K 30313233343536373839616263646566 -base64
+   printf 'timestamp=1700000000' | openssl dgst -sha256 -hmac secret
+说明：config.ini 中的 aes_key 为占位值，无法复现 data/login_data.py 中的真实密文，
+      替换为真实密钥后可补充"明文密码 → 登录数据密文"的用例
+"""
+import pytest
+from utils.crypto_util import aes_encrypt, canonical_string, Signer, AESFieldTransform, SignTransform
+
+AES_KEY = "0123456789abcdef"
+AES_IV = "fedcba9876543210"
+TIMESTAMP = 1700000000
+
+
+def test_aes_encrypt_known_vectors():
+    """AES-128/256 ECB、AES-128 CBC（PKCS7填充，Base64输出）"""
+    assert aes_encrypt("Test@123456", AES_KEY) == "M1frlvWfL45ib9K6fvnrOA=="
+    assert aes_encrypt("Test@123456", AES_KEY, "CBC", AES_IV) == "7io65zoDJcljz/oMq9qdRQ=="
+    assert aes_encrypt("中文密码1234567890", AES_KEY * 2, "ecb") == "wfBbt9abwvMcXWzpxLU+b00xv11TOCY1AgoC2KEaoXU="
+
+
+@pytest.mark.parametrize("iv", [None, "", "short_iv"])
+def test_aes_encrypt_cbc_requires_16_byte_iv(iv):
+    """CBC模式IV缺失或长度不对：抛出ValueError"""
+    with pytest.raises(ValueError, match="IV"):
+        aes_encrypt("Test@123456", AES_KEY, "CBC", iv)
+
+
+def test_aes_encrypt_unsupported_mode():
+    with pytest.raises(ValueError, match="不支持的AES模式"):
+        aes_encrypt("Test@123456", AES_KEY, "GCM")
+
+
+def test_canonical_string():
+    """key升序、None跳过、非字符串值按紧凑JSON序列化、timestamp参与排序"""
+    params = {"b": {"y": 2, "x": [1, "中"]}, "a": 1, "skip": None, "z": "v"}
+    assert canonical_string(params, TIMESTAMP) == 'a=1&b={"x":[1,"中"],"y":2}&timestamp=1700000000&z=v'
+    assert canonical_string(None, TIMESTAMP) == "timestamp=1700000000"
+
+
+def test_signer_known_vectors():
+    """md5(原文+secret)、HMAC-SHA256(secret, 原文)"""
+    md5_signer = Signer("secret")
+    assert md5_signer.sign({}, TIMESTAMP) == {"timestamp": TIMESTAMP, "sign": "8a10fccca65d7b6b1131b52b35aca9ef"}
+    hmac_signer = Signer("secret", "HMAC-SHA256")
+    assert hmac_signer.sign({}, TIMESTAMP)["sign"] == \
+        "64e07dc8254f55df9a8b73101668ca102e119c2b712ca363d46ad635e1fa2c65"
+    assert hmac_signer.sign({"b": {"x": [1, 2]}, "a": 1}, TIMESTAMP)["sign"] == \
+        "06651d487689eb931ffb5a4492c61b5c2958b9444a483de1e82c315e8e6819cd"
+
+
+def test_signer_batch_and_cache():
+    """批量签名共用时间戳，重复参数命中缓存"""
+    signer = Signer("secret", "hmac-sha256")
+    results = signer.sign_batch([{"a": 1}, {"a": 2}, {"a": 1}], TIMESTAMP)
+    assert {r["timestamp"] for r in results} == {TIMESTAMP}
+    assert results[0] == results[2] != results[1]
+    assert signer.cache_info().hits == 1
+
+
+def test_signer_unsupported_algorithm():
+    with pytest.raises(ValueError, match="不支持的签名算法"):
+        Signer("secret", "sha1")
+
+
+def test_aes_field_transform():
+    """只加密指定的字符串字段，不修改调用方原始字典"""
+    transform = AESFieldTransform(fields=["password"], key=AES_KEY, mode="ECB")
+    original = {"account": "laity.wang", "password": "Test@123456"}
+    kwargs = {"json": original}
+    transform("POST", "/syslogin/admin/user/login", {}, kwargs)
+    assert kwargs["json"] == {"account": "laity.wang", "password": "M1frlvWfL45ib9K6fvnrOA=="}
+    assert original["password"] == "Test@123456"
+    # 无目标字段 / 非JSON请求体：不做处理
+    untouched = {"json": {"account": "laity.wang"}, "data": "raw"}
+    transform("POST", "/x", {}, untouched)
+    assert untouched == {"json": {"account": "laity.wang"}, "data": "raw"}
+
+
+def test_sign_transform(monkeypatch):
+    """查询参数 + JSON请求体顶层字段参与签名，结果写入请求头"""
+    monkeypatch.setattr("utils.crypto_util.get_timestamp", lambda: TIMESTAMP)
+    transform = SignTransform(Signer("secret", "hmac-sha256"))
+    headers = {}
+    transform("POST", "/x", headers, {"params": {"a": 1}, "json": {"b": {"x": [1, 2]}}})
+    assert headers == {"timestamp": str(TIMESTAMP),
+                       "sign": "06651d487689eb931ffb5a4492c61b5c2958b9444a483de1e82c315e8e6819cd"}
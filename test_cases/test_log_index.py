@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+日志索引测试用例（utils.log_index）
+在临时目录写入与utils.log_util文件格式一致的日志（含轮转备份.log.1、多行异常堆栈），
+校验按用例/请求关联ID/接口路径/状态码检索的结果，以及日志变化后索引自动重建
+"""
+import pytest
+from utils.log_index import LogSearcher
+
+LOG_NAME = "api_test_20261019.log"
+TEST_A = "test_cases/test_login.py::test_login_success"
+TEST_B = "test_cases/test_login.py::test_login_failed"
+
+
+def log_line(test_id: str, request_id: str, message: str, level: str = "INFO") -> str:
+    """按utils.log_util文件日志格式生成一行"""
+    return (f"2026-10-19 10:00:00 - api_test - {level} - base_request.py:100 - "
+            f"[test={test_id} req={request_id}] - {message}\n")
+
+
+def request_lines(test_id: str, request_id: str, path: str, status) -> list:
+    """一次请求的日志行（含BaseRequest输出的请求摘要行）"""
+    return [
+        log_line(test_id, request_id, "===== 开始POST请求 ====="),
+        log_line(test_id, request_id, f"请求摘要：method=POST path={path} status={status}"),
+        log_line(test_id, request_id, f"响应体（JSON）：{{'code': {status}}}"),
+    ]
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """轮转备份（较早）：用例A的一次登录请求；当前日志：用例B的失败请求 + 多行异常堆栈 + 无上下文的日志"""
+    backup = request_lines(TEST_A, "req-a1", "/syslogin/admin/user/login", 200)
+    current = [log_line("-", "-", "数据库连接成功")]
+    current += request_lines(TEST_B, "req-b1", "/syslogin/admin/user/login", 500)
+    current += [
+        log_line(TEST_B, "-", "用例执行失败：boom", level="ERROR"),
+        "Traceback (most recent call last):\n",
+        '  File "test_login.py", line 10, in test_login_failed\n',
+        "ValueError: boom\n",
+    ]
+    current += request_lines(TEST_B, "req-b2", "/api/v1/user/info", 200)
+    (tmp_path / f"{LOG_NAME}.1").write_text("".join(backup), encoding="utf-8")
+    (tmp_path / LOG_NAME).write_text("".join(current), encoding="utf-8")
+    return tmp_path
+
+
+def messages(results) -> list:
+    return [(file_name, line.split(" - ")[-1]) for file_name, line in results]
+
+
+def test_search_by_test_includes_traceback(log_dir):
+    """按用例检索：包含该用例的全部日志行及异常堆栈续行，不含其他用例和无上下文的日志"""
+    results = LogSearcher(str(log_dir)).search(test=TEST_B)
+    lines = [line for _, line in results]
+    assert len(lines) == 10
+    assert all(name == LOG_NAME for name, _ in results)
+    assert lines[3].endswith("用例执行失败：boom")
+    assert lines[4:7] == ["Traceback (most recent call last):",
+                          '  File "test_login.py", line 10, in test_login_failed', "ValueError: boom"]
+    assert not any("数据库连接成功" in line for line in lines)
+
+
+def test_search_by_request_id(log_dir):
+    """按请求关联ID检索：只返回该请求的日志行"""
+    results = LogSearcher(str(log_dir)).search(req="req-b1")
+    assert messages(results) == [
+        (LOG_NAME, "===== 开始POST请求 ====="),
+        (LOG_NAME, "请求摘要：method=POST path=/syslogin/admin/user/login status=500"),
+        (LOG_NAME, "响应体（JSON）：{'code': 500}"),
+    ]
+
+
+def test_search_by_path_across_rotated_files(log_dir):
+    """按接口路径检索：跨轮转备份和当前日志，按时间顺序（.log.1在前）返回"""
+    results = LogSearcher(str(log_dir)).search(path="/syslogin/admin/user/login")
+    assert [name for name, _ in results] == [f"{LOG_NAME}.1"] * 3 + [LOG_NAME] * 3
+    assert "req=req-a1" in results[0][1] and "req=req-b1" in results[3][1]
+
+
+def test_search_by_status_and_combined(log_dir):
+    """按状态码检索；多条件之间取交集"""
+    searcher = LogSearcher(str(log_dir))
+    assert {line.split("req=")[1].split("]")[0] for _, line in searcher.search(status=500)} == {"req-b1"}
+    assert len(searcher.search(status=200)) == 6
+    assert len(searcher.search(test=TEST_B, status=200)) == 3
+    assert searcher.search(test=TEST_A, status=500) == []
+    assert searcher.search(req="not-exists") == []
+
+
+def test_index_rebuilt_after_log_changes(log_dir):
+    """日志追加后索引过期，下次检索自动重建并包含新日志；轮转备份未变化不重建"""
+    searcher = LogSearcher(str(log_dir))
+    assert len(searcher.search(req="req-b2")) == 3
+    current, backup = str(log_dir / LOG_NAME), str(log_dir / f"{LOG_NAME}.1")
+    assert searcher.is_fresh(current) and searcher.is_fresh(backup)
+    backup_index_mtime = (log_dir / ".index" / f"{LOG_NAME}.1.idx").stat().st_mtime_ns
+
+    with open(current, "a", encoding="utf-8") as f:
+        f.write(log_line(TEST_B, "req-b2", "断言完成"))
+    assert not searcher.is_fresh(current)
+    results = searcher.search(req="req-b2")
+    assert len(results) == 4 and results[-1][1].endswith("断言完成")
+    assert searcher.is_fresh(current)
+    assert (log_dir / ".index" / f"{LOG_NAME}.1.idx").stat().st_mtime_ns == backup_index_mtime
+
+
+def test_index_rebuilt_after_rotation(log_dir):
+    """日志轮转改名（.log → .log.1 → .log.2）后，同名索引按文件签名判定过期并重建"""
+    searcher = LogSearcher(str(log_dir))
+    assert len(searcher.search(path="/syslogin/admin/user/login")) == 6
+    (log_dir / f"{LOG_NAME}.1").rename(log_dir / f"{LOG_NAME}.2")
+    (log_dir / LOG_NAME).rename(log_dir / f"{LOG_NAME}.1")
+    (log_dir / LOG_NAME).write_text("".join(request_lines(TEST_A, "req-a2", "/syslogin/admin/user/login", 200)),
+                                    encoding="utf-8")
+    results = searcher.search(path="/syslogin/admin/user/login")
+    assert [name for name, _ in results] == [f"{LOG_NAME}.2"] * 3 + [f"{LOG_NAME}.1"] * 3 + [LOG_NAME] * 3
+    assert [line.split("req=")[1].split("]")[0] for _, line in results[::3]] == ["req-a1", "req-b1", "req-a2"]
@@ -5,13 +5,17 @@
 1. core.base_request.request_util：全局接口请求实例（已初始化，直接调用）
 2. data.login_data.success_case：登录成功测试数据
 3. conftest.db_connect：数据库连接夹具（可选，若无需数据库可删除）
+4. conftest.login_token：登录token夹具（core.token_cache缓存，有效期内只登录一次）
 """
+import pytest
 from utils.log_util import logger
 # 关键修改：导入全局实例request_util，而非BaseRequest类
 from core.base_request import request_util
+from core.token_cache import token_cache
 from data.login_data import success_case
 
 
+@pytest.mark.sla(p95=500, max=1000)
 def test_login_success(db_connect):
     """
     正常登录用例（账号密码正确）
@@ -20,6 +24,7 @@ def test_login_success(db_connect):
     2. 调用登录接口（POST请求）
     3. 断言响应结果（状态码、业务码、提示语、token）
     4. （可选）数据库验证（当前仅做连接/关闭，无实际校验）
+    5. 耗时校验：sla标记要求登录接口P95<=500ms、最大<=1000ms（conftest自动校验）
     """
     # 1. 日志记录：用例开始
     logger.info(f"开始执行用例：{success_case['case_name']}")
@@ -55,3 +60,22 @@ def test_login_success(db_connect):
         logger.error(f"用例执行失败：{str(e)}", exc_info=True)
         raise  # 必须重新抛出，否则pytest会认为用例成功
 
+
+
+def test_login_token_cached(login_token):
+    """
+    登录token夹具用例（core.token_cache缓存）
+    测试步骤：
+    1. login_token夹具登录并返回token（有效期内同一环境+账号只登录一次）
+    2. 断言token非空
+    3. 再次从缓存获取，断言不重新登录、返回同一token（run_daemon.py常驻进程中修改用例后重跑同样复用）
+    """
+    logger.info("开始执行用例：登录token缓存复用")
+    assert login_token, "login_token夹具返回的token为空"
+
+    def login_again():
+        raise AssertionError("token缓存未命中，重复调用了登录接口")
+
+    key = (request_util.base_url, success_case["request_data"]["account"])
+    assert token_cache.get(key, login_again) == login_token, "缓存的token与夹具返回的token不一致"
+    logger.info("用例执行成功")
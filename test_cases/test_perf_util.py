@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+性能工具类测试用例（utils.perf_util）
+覆盖：百分位数与Mann-Whitney U检验的已知结果、回归检测的样本不足降级规则和min_ratio门槛、
+xdist worker结果导出/合并
+"""
+import pytest
+from utils.perf_util import percentile, mann_whitney_u, LatencyRecorder, LatencyStore
+
+ENDPOINT = "POST /syslogin/admin/user/login"
+
+
+def test_percentile_known_values():
+    """线性插值百分位数（与numpy默认算法结果一致）"""
+    assert percentile([], 95) is None
+    assert percentile([7], 95) == 7
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile(list(range(1, 11)), 95) == pytest.approx(9.55)
+    assert percentile(list(range(1, 11)), 100) == 10
+
+
+def test_mann_whitney_u_same_distribution():
+    """两组样本相同：p≈0.5（无证据表明变慢）"""
+    samples = [float(v) for v in range(1, 21)]
+    assert mann_whitney_u(samples, samples) == pytest.approx(0.5, abs=0.02)
+
+
+def test_mann_whitney_u_disjoint():
+    """本次全部慢于基线：p远小于0.01；本次全部快于基线：p≈1"""
+    baseline = [float(v) for v in range(100, 120)]
+    slower = [float(v) for v in range(200, 220)]
+    assert mann_whitney_u(slower, baseline) < 1e-6
+    assert mann_whitney_u(baseline, slower) > 0.999
+
+
+def test_mann_whitney_u_all_ties():
+    """全部样本相等：方差为0，返回1.0（不判回归）"""
+    assert mann_whitney_u([10.0] * 5, [10.0] * 5) == 1.0
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    """使用临时历史库的耗时记录器（判定参数固定，不受config.ini影响）"""
+    recorder = LatencyRecorder()
+    recorder.db_path = str(tmp_path / "latency_history.db")
+    recorder.baseline_runs = 10
+    recorder.min_samples = 5
+    recorder.p_value = 0.01
+    recorder.min_ratio = 1.2
+    return recorder
+
+
+def save_baseline(recorder, values):
+    """写入一次历史运行作为基线"""
+    samples = [{"endpoint": ENDPOINT, "test_id": "t", "status_code": 200, "elapsed_ms": v} for v in values]
+    LatencyStore(recorder.db_path).save_run("baseline_run", samples)
+
+
+def record(recorder, values):
+    for value in values:
+        recorder.record("POST", "/syslogin/admin/user/login", value, 200)
+
+
+def test_detect_regressions_statistical(recorder):
+    """样本充足：明显变慢判为回归，并给出p值"""
+    save_baseline(recorder, range(100, 120))
+    record(recorder, range(200, 220))
+    regressions = recorder.detect_regressions()
+    assert [item["endpoint"] for item in regressions] == [ENDPOINT]
+    assert regressions[0]["p_value"] < 0.01
+    assert regressions[0]["ratio"] == pytest.approx(209.5 / 109.5)
+
+
+def test_detect_regressions_small_sample_fallback(recorder):
+    """样本不足：本次最小耗时高于基线P95才判为回归（p值为None）"""
+    save_baseline(recorder, [10, 11, 12])
+    record(recorder, [30, 31])
+    regressions = recorder.detect_regressions()
+    assert len(regressions) == 1 and regressions[0]["p_value"] is None
+
+
+def test_detect_regressions_small_sample_overlap(recorder):
+    """样本不足且本次最小耗时未超过基线P95：中位数虽变慢也不判回归"""
+    save_baseline(recorder, [10, 11, 12])
+    record(recorder, [11, 30])
+    assert recorder.detect_regressions() == []
+
+
+def test_detect_regressions_min_ratio_gate(recorder):
+    """中位数变慢不足min_ratio倍：即使检验显著也视为正常波动"""
+    save_baseline(recorder, range(100, 120))
+    record(recorder, range(112, 132))
+    assert recorder.detect_regressions() == []
+    recorder.min_ratio = 1.05
+    recorder._regressions = None
+    assert len(recorder.detect_regressions()) == 1
+
+
+def test_detect_regressions_without_baseline(recorder):
+    """首次运行（无历史基线）：不判回归"""
+    record(recorder, [500, 600])
+    assert recorder.detect_regressions() == []
+
+
+def test_export_merge(recorder):
+    """xdist：worker导出的样本和SLA结果合并到主进程记录器"""
+    worker = LatencyRecorder()
+    record(worker, [50, 60])
+    with pytest.raises(AssertionError):
+        worker.check_sla(None, max=55)
+    recorder.merge(worker.export())
+    assert sorted(s["elapsed_ms"] for s in recorder.samples) == [50, 60]
+    assert len(recorder.sla_violations) == 1
+    assert any(line.startswith("[SLA]") for line in recorder.summary_lines())
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+常驻测试运行进程测试用例（run_daemon，离线：临时目录作为项目根目录，不连接数据库/SSH）
+覆盖：_snapshot/_reload_changed 按修改时间卸载测试/数据模块、core/utils 修改时的重启提示、
+run() 返回退出码与耗时、Unix域套接字权限0600、格式错误/认证失败的请求被拒绝、TCP退回模式token认证
+"""
+import io
+import os
+import sys
+import json
+import types
+import socket
+import shutil
+import tempfile
+import threading
+import pytest
+import run_daemon
+from core.db_operation import db_util
+
+PASSING_TEST = "def test_ok():\n    assert 1 + 1 == 2\n"
+
+
+def touch(path, offset_ns: int = 10 ** 9) -> None:
+    """推后文件修改时间（不依赖文件系统时间精度）"""
+    mtime = os.stat(path).st_mtime_ns + offset_ns
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """临时项目根目录：test_cases/、data/、core/ 各一个文件"""
+    for name, content in (("test_cases/test_fake.py", PASSING_TEST), ("data/fake_data.py", "CASES = []\n"),
+                          ("core/fake_core.py", "")):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(content, encoding="utf-8")
+    monkeypatch.setattr(run_daemon, "PROJECT_ROOT", str(tmp_path))
+    # WarmRunner 会切换工作目录、修改sys.path、开启数据库常驻模式：测试结束后恢复
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(db_util, "keep_alive", db_util.keep_alive)
+    yield tmp_path
+    # 卸载从临时目录导入的模块，避免下一个用例的同名测试文件导入冲突
+    for name, module in list(sys.modules.items()):
+        if str(getattr(module, "__file__", None) or "").startswith(str(tmp_path)):
+            del sys.modules[name]
+
+
+@pytest.fixture
+def runner(project):
+    return run_daemon.WarmRunner()
+
+
+def fake_module(monkeypatch, name: str, path) -> None:
+    monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    sys.modules[name].__file__ = str(path)
+
+
+def test_snapshot_collects_py_files(project):
+    """快照只收集.py文件，不存在的单个文件跳过"""
+    (project / "data" / "notes.txt").write_text("x", encoding="utf-8")
+    snapshot = run_daemon._snapshot(("test_cases", "data"), ("conftest.py",))
+    assert sorted(snapshot) == [str(project / "data" / "fake_data.py"), str(project / "test_cases" / "test_fake.py")]
+
+
+def test_reload_unchanged_keeps_modules(runner, project, monkeypatch):
+    """文件无变化：不卸载任何模块"""
+    fake_module(monkeypatch, "test_fake", project / "test_cases" / "test_fake.py")
+    modules_before = set(sys.modules)
+    assert runner._reload_changed() == []
+    assert set(sys.modules) == modules_before
+
+
+def test_reload_edited_file_unloads_modules(runner, project, monkeypatch):
+    """数据文件修改：卸载全部测试/数据模块（含未修改的），不卸载项目外模块；之后再检查无变化"""
+    fake_module(monkeypatch, "test_fake", project / "test_cases" / "test_fake.py")
+    fake_module(monkeypatch, "fake_data", project / "data" / "fake_data.py")
+    fake_module(monkeypatch, "fake_core", project / "core" / "fake_core.py")
+    touch(project / "data" / "fake_data.py")
+    assert runner._reload_changed() == [str(project / "data" / "fake_data.py")]
+    assert "test_fake" not in sys.modules and "fake_data" not in sys.modules
+    assert "fake_core" in sys.modules and "json" in sys.modules
+    assert runner._reload_changed() == []
+
+
+def test_reload_new_file_detected(runner, project):
+    """新增测试文件也算变化"""
+    new_file = project / "test_cases" / "test_new.py"
+    new_file.write_text(PASSING_TEST, encoding="utf-8")
+    assert runner._reload_changed() == [str(new_file)]
+
+
+def test_run_returns_exit_code_and_timing(runner, project):
+    """run()：返回pytest退出码、重载文件、各阶段耗时；输出写入out；无core/utils修改时不提示重启"""
+    out = io.StringIO()
+    result = runner.run(["-q", "-p", "no:cacheprovider", "test_cases/test_fake.py"], out)
+    assert result["exit_code"] == 0 and result["changed"] == []
+    timing = result["timing"]
+    assert 0 <= timing["reload_s"] <= timing["startup_s"] <= timing["total_s"]
+    assert "1 passed" in out.getvalue() and "提示" not in out.getvalue()
+
+    (project / "test_cases" / "test_fake.py").write_text("def test_fail():\n    assert False\n", encoding="utf-8")
+    touch(project / "test_cases" / "test_fake.py")
+    result = runner.run(["-q", "-p", "no:cacheprovider", "test_cases/test_fake.py"], io.StringIO())
+    assert result["exit_code"] == 1
+    assert result["changed"] == [str(project / "test_cases" / "test_fake.py")]
+
+
+def test_run_restart_hint(runner, project):
+    """core/ 有修改：输出重启提示（不自动重载），用例照常执行"""
+    touch(project / "core" / "fake_core.py")
+    out = io.StringIO()
+    result = runner.run(["-q", "-p", "no:cacheprovider", "test_cases/test_fake.py"], out)
+    assert result["exit_code"] == 0
+    assert "core/ 或 utils/ 有修改" in out.getvalue()
+
+
+class FakeRunner:
+    """记录收到的参数，不执行pytest"""
+
+    def __init__(self):
+        from utils.log_util import logger
+        self.logger = logger
+        self.calls = []
+
+    def run(self, args, out):
+        self.calls.append(args)
+        out.write("running\n")
+        return {"exit_code": 0, "changed": [], "timing": {"reload_s": 0.0, "startup_s": 0.0, "total_s": 0.0}}
+
+
+@pytest.fixture
+def daemon_server():
+    """在后台线程运行的服务端（Unix域套接字路径放在短临时目录，避免超出路径长度限制）"""
+    created = []
+
+    def start(**kwargs):
+        server = run_daemon.create_server(**kwargs)
+        server.runner = FakeRunner()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        created.append(server)
+        return server
+
+    yield start
+    for server in created:
+        server.shutdown()
+        server.server_close()
+        run_daemon.remove_server_files(server)
+
+
+def send_line(connect, line: bytes) -> list:
+    """发送一行原始请求（发送后关闭写端，模拟客户端断开），返回全部回复"""
+    conn = connect()
+    with conn, conn.makefile("rwb") as stream:
+        stream.write(line)
+        stream.flush()
+        conn.shutdown(socket.SHUT_WR)
+        return [json.loads(item) for item in stream]
+
+
+@pytest.mark.skipif(not run_daemon.HAS_UNIX_SOCKET, reason="平台不支持AF_UNIX")
+def test_unix_socket_mode_and_bad_requests(daemon_server):
+    """套接字文件权限0600；空行/非JSON/非对象/非法参数被拒绝（退出码2），服务端继续可用"""
+    socket_dir = tempfile.mkdtemp(prefix="daemon_")
+    try:
+        socket_path = os.path.join(socket_dir, "d.sock")
+        server = daemon_server(socket_path=socket_path)
+        assert server.token is None
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+
+        def connect():
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(socket_path)
+            return conn
+
+        for line in (b"\n", b"", b"not json\n", b"[1, 2]\n", b'{"action": "run", "args": "x"}\n',
+                     b'{"action": "exec"}\n'):
+            reply, = send_line(connect, line)
+            assert reply["type"] == "result" and reply["exit_code"] == 2
+        assert server.runner.calls == []
+        assert send_line(connect, b'{"action": "run", "args": ["-q"]}\n')[-1]["exit_code"] == 0
+        assert server.runner.calls == [["-q"]]
+        assert run_daemon.submit({"action": "run", "args": ["-x"]}, socket_path) == 0
+        assert server.runner.calls[-1] == ["-x"]
+        # 套接字已被占用：不允许启动第二个常驻进程
+        with pytest.raises(RuntimeError):
+            run_daemon.create_server(socket_path=socket_path)
+    finally:
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+def test_tcp_fallback_requires_token(daemon_server, tmp_path, monkeypatch, capsys):
+    """不支持AF_UNIX时：随机端口+token文件（0600），无token/错误token被拒绝，submit自动携带token"""
+    token_file = tmp_path / "run_daemon.token"
+    monkeypatch.setattr(run_daemon, "HAS_UNIX_SOCKET", False)
+    monkeypatch.setattr(run_daemon, "TOKEN_FILE", str(token_file))
+    server = daemon_server(port=0)
+    info = json.loads(token_file.read_text(encoding="utf-8"))
+    assert info == {"port": server.server_address[1], "token": server.token}
+    if os.name == "posix":
+        assert os.stat(token_file).st_mode & 0o777 == 0o600
+
+    def connect():
+        return socket.create_connection(("127.0.0.1", info["port"]))
+
+    for line in (b'{"action": "run", "args": []}\n', b'{"action": "run", "args": [], "token": "wrong"}\n',
+                 b'{"action": "stop", "token": 1}\n'):
+        assert send_line(connect, line) == [{"type": "result", "exit_code": 2, "message": "认证失败：token不匹配"}]
+    assert server.runner.calls == []
+    assert run_daemon.submit({"action": "run", "args": ["-q"]}) == 0
+    assert server.runner.calls == [["-q"]]
+    assert "running" in capsys.readouterr().out
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+跨环境影子对比测试用例（core.shadow_request）
+覆盖：json_diff 的忽略字段通配、列表长度不一致、类型不一致（数值不区分int/float）、
+ShadowComparator.outcome 从异常链中取回HTTP错误响应、影子侧不重试、
+影子请求超时记为差异且用例线程不等待影子结果
+"""
+import time
+import datetime
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from requests.exceptions import HTTPError, RequestException
+from core.base_request import BaseRequest
+from core.shadow_request import json_diff, ShadowComparator, ShadowReport
+from benchmarks.stub_server import StubServer, USER_INFO_PATH
+
+
+def test_json_diff_equal_and_value():
+    """相同对象无差异；叶子值不同报value，路径用点分隔"""
+    body = {"code": 200, "data": {"user": {"name": "a", "tags": ["x"]}}}
+    assert json_diff(body, body) == []
+    other = {"code": 200, "data": {"user": {"name": "b", "tags": ["x"]}}}
+    assert json_diff(body, other) == [("data.user.name", "value", "a", "b")]
+    assert json_diff(1, 2) == [("$", "value", 1, 2)]
+
+
+def test_json_diff_missing_keys():
+    """字段缺失：按缺失侧区分missing_left/missing_right"""
+    assert json_diff({"a": 1, "b": 2}, {"a": 1, "c": 3}) == [
+        ("b", "missing_right", 2, None), ("c", "missing_left", None, 3)
+    ]
+
+
+def test_json_diff_ignore_patterns():
+    """忽略字段：精确路径、*通配任意层级、列表下标通配"""
+    left = {"timestamp": 1, "data": {"token": "t1", "traceId": "a",
+                                     "list": [{"id": 1, "updateTime": "x"}, {"id": 2, "updateTime": "y"}]}}
+    right = {"timestamp": 2, "data": {"token": "t2", "traceId": "b",
+                                      "list": [{"id": 1, "updateTime": "z"}, {"id": 3, "updateTime": "w"}]}}
+    ignore = ["timestamp", "data.token", "*.traceId", "data.list.*.updateTime"]
+    assert json_diff(left, right, ignore) == [("data.list.1.id", "value", 2, 3)]
+
+
+def test_json_diff_list_length_mismatch():
+    """列表长度不同：多出的元素逐个报missing"""
+    assert json_diff({"items": [1, 2, 3]}, {"items": [1]}) == [
+        ("items.1", "missing_right", 2, None), ("items.2", "missing_right", 3, None)
+    ]
+    assert json_diff([], [{"id": 1}]) == [("0", "missing_left", None, {"id": 1})]
+
+
+def test_json_diff_type_mismatch():
+    """类型不同报type：对象与列表、字符串与数值、bool与数值、null与值"""
+    assert json_diff({"data": {}}, {"data": []}) == [("data", "type", {}, [])]
+    assert json_diff({"id": "1"}, {"id": 1}) == [("id", "type", "1", 1)]
+    assert json_diff({"ok": True}, {"ok": 1}) == [("ok", "type", True, 1)]
+    assert json_diff({"v": None}, {"v": 0}) == [("v", "type", None, 0)]
+
+
+def test_json_diff_numbers_ignore_int_float():
+    """数值不区分int/float：1与1.0一致，1与1.5报value"""
+    assert json_diff({"price": 1, "rate": 0.5}, {"price": 1.0, "rate": 0.5}) == []
+    assert json_diff({"price": 1}, {"price": 1.5}) == [("price", "value", 1, 1.5)]
+
+
+def make_response(status_code: int, content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.elapsed = datetime.timedelta(milliseconds=12)
+    return response
+
+
+def test_outcome_from_response():
+    """正常响应：JSON响应体解析为对象，非JSON保留文本"""
+    assert ShadowComparator.outcome(response=make_response(200, b'{"code": 200}')) == {
+        "status": 200, "body": {"code": 200}, "elapsed_ms": 12.0, "error": None
+    }
+    assert ShadowComparator.outcome(response=make_response(200, b"ok"))["body"] == "ok"
+
+
+def test_outcome_from_wrapped_http_error():
+    """BaseRequest把HTTPError包装为RequestException抛出：沿异常链取回响应，仍参与对比"""
+    response = make_response(500, b'{"code": 500, "msg": "error"}')
+    try:
+        try:
+            raise HTTPError("500 Server Error", response=response)
+        except HTTPError as e:
+            raise RequestException("HTTP请求失败：状态码500") from e
+    except RequestException as wrapped:
+        result = ShadowComparator.outcome(error=wrapped)
+    assert result == {"status": 500, "body": {"code": 500, "msg": "error"}, "elapsed_ms": 12.0, "error": None}
+
+
+def test_outcome_without_response():
+    """连接失败等无响应的异常：记录错误信息"""
+    result = ShadowComparator.outcome(error=RequestException("请求超时/连接失败"))
+    assert result == {"status": None, "body": None, "elapsed_ms": None, "error": "请求超时/连接失败"}
+
+
+def test_shadow_report_summary():
+    """汇总：调用次数、不一致次数、高频差异字段"""
+    report = ShadowReport()
+    report.record("GET /a", [("data.x", "value", 1, 2)], 10.0, 20.0)
+    report.record("GET /a", [], 30.0, None)
+    line, = report.summary_lines()
+    assert line.startswith("[影子对比] GET /a：2次，不一致1次")
+    assert "差异字段：data.x×1" in line
+
+
+@pytest.fixture
+def report(monkeypatch):
+    """替换全局汇总，避免测试数据出现在本次运行的影子对比汇总中"""
+    report = ShadowReport()
+    monkeypatch.setattr("core.shadow_request.shadow_report", report)
+    return report
+
+
+def test_compare_timeout_recorded_as_error(report):
+    """影子结果超过等待上限：记为$error超时差异，不比较状态码和响应体"""
+    comparator = ShadowComparator(BaseRequest(timeout=5), ignore_fields=[])
+    try:
+        primary = ShadowComparator.outcome(response=make_response(200, b'{"code": 200}'))
+        start = time.monotonic()
+        diffs = comparator.compare("GET", "/a", primary, Future(), timeout=0.05)
+        assert time.monotonic() - start < 1
+        assert [(field, kind) for field, kind, _, _ in diffs] == [("$error", "timeout")]
+        assert report.endpoints["GET /a"]["mismatches"] == 1
+        assert report.endpoints["GET /a"]["shadow_ms"] == []
+    finally:
+        comparator.close()
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """模拟响应很慢的影子环境（1秒后返回）"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(1)
+        body = b'{"code": 200}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """关闭访问日志"""
+
+
+def test_shadow_does_not_block_primary(report):
+    """影子环境很慢：主请求不等待影子结果；影子侧不重试；超过等待上限记为超时差异"""
+    slow = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    slow.daemon_threads = True
+    threading.Thread(target=slow.serve_forever, daemon=True).start()
+    try:
+        with StubServer() as primary_server:
+            client = BaseRequest(timeout=5, retry_config={"max_retries": 3, "delay": 1})
+            client.base_url = primary_server.base_url
+            client.record_latency = False
+            client.enable_shadow("pre", ignore_fields=[])
+            assert client.shadow.client.retry_config == {"max_retries": 1, "delay": 0}
+            assert client.shadow.timeout == 5
+            client.shadow.client.base_url = f"http://127.0.0.1:{slow.server_address[1]}"
+            client.shadow.timeout = 0.2
+            start = time.monotonic()
+            response = client.get(USER_INFO_PATH)
+            assert response.status_code == 200
+            assert time.monotonic() - start < 0.5
+            client.disable_shadow()
+        stats = report.endpoints[f"GET {USER_INFO_PATH}"]
+        assert stats["calls"] == 1 and list(stats["fields"]) == ["$error"]
+    finally:
+        slow.shutdown()
+        slow.server_close()
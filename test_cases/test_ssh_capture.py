@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+服务端日志/指标后台采集测试用例（core.ssh_capture，离线：不建立SSH连接）
+覆盖：_ChunkWriter 按时长分块、read() 时间窗口过滤与分块跳过、采集中读取当前分块、
+correlate() 按请求时间窗口切片、_read_loop 单个通道出错只停止该通道
+"""
+import os
+import socket
+import threading
+import pytest
+from core.ssh_capture import SSHCapture, _ChunkWriter
+
+STREAM = "log_api_server.log"
+
+
+@pytest.fixture
+def capture(tmp_path):
+    """不连接SSH的采集器，数据流写入器直接挂到采集器上（与start()中的结构一致）"""
+    capture = SSHCapture(ssh=object(), log_files=[], metric_commands={}, output_dir=str(tmp_path), chunk_seconds=10)
+    capture._writers[STREAM] = _ChunkWriter(os.path.join(str(tmp_path), STREAM), capture.chunk_seconds)
+    return capture
+
+
+def write_rows(capture, timestamps):
+    with capture._lock:
+        for timestamp in timestamps:
+            capture._writers[STREAM].write(timestamp, f"line at {timestamp}")
+
+
+def test_chunk_writer_splits_by_duration(capture, tmp_path):
+    """分块按时长切分，文件名为分块起始毫秒时间戳；封口后可完整读取"""
+    write_rows(capture, [1000.0, 1005.5, 1010.0, 1019.9, 1020.0])
+    capture._writers[STREAM].close()
+    assert sorted(os.listdir(tmp_path / STREAM)) == ["1000000.gz", "1010000.gz", "1020000.gz"]
+    assert capture.read(STREAM) == [(t, f"line at {t}") for t in (1000.0, 1005.5, 1010.0, 1019.9, 1020.0)]
+    assert capture.streams() == [STREAM]
+    assert capture.read("not_exists") == []
+
+
+def test_read_window_skips_chunks(capture, tmp_path):
+    """按时间窗口读取：只返回窗口内的行；与窗口无交集的分块不解压（损坏也不影响）"""
+    write_rows(capture, [1000.0 + i for i in range(40)])
+    capture._writers[STREAM].close()
+    (tmp_path / STREAM / "1000000.gz").write_bytes(b"corrupted")
+    (tmp_path / STREAM / "1030000.gz").write_bytes(b"corrupted")
+    rows = capture.read(STREAM, start_time=1012.0, end_time=1015.0)
+    assert [t for t, _ in rows] == [1012.0, 1013.0, 1014.0, 1015.0]
+
+
+def test_read_live_chunk(capture):
+    """采集中（分块未封口）也能读取已写入的行"""
+    write_rows(capture, [1000.0, 1001.0])
+    assert [t for t, _ in capture.read(STREAM)] == [1000.0, 1001.0]
+    write_rows(capture, [1002.0])
+    assert [t for t, _ in capture.read(STREAM, start_time=1001.5)] == [1002.0]
+
+
+def test_read_live_chunk_while_writing(capture, monkeypatch):
+    """
+    读取当前分块时后台线程仍在追加：只解压到同步点，返回的都是完整行
+    （在read()释放锁之后、打开分块文件之前注入一批写入，模拟并发追加）
+    """
+    write_rows(capture, [1000.0, 1001.0])
+    writer = capture._writers[STREAM]
+
+    def open_after_append(*args, **kwargs):
+        for index in range(5000):
+            writer.write(1002.0 + index / 1000, f"row {index} " + "%032x" % (index * 2654435761))
+        # 压缩器输出、文件缓冲落盘，但未做同步刷新：文件末尾可能是半个压缩块/半行
+        writer._file.flush()
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr("core.ssh_capture.open", open_after_append, raising=False)
+    assert capture.read(STREAM) == [(1000.0, "line at 1000.0"), (1001.0, "line at 1001.0")]
+    monkeypatch.undo()
+    rows = capture.read(STREAM)
+    assert len(rows) == 5002 and rows[-1] == (1006.999, "row 4999 " + "%032x" % (4999 * 2654435761))
+
+
+def test_correlate_slices_by_sample_window(capture):
+    """按每个请求的起止时间（前后扩展margin）切片服务端数据"""
+    write_rows(capture, [1000.0 + i for i in range(30)])
+    samples = [
+        {"endpoint": "POST /login", "test_id": "t1", "elapsed_ms": 500.0, "start_time": 1005.0, "end_time": 1005.5},
+        {"endpoint": "GET /info", "test_id": "t2", "elapsed_ms": 100.0, "start_time": 1020.2, "end_time": 1020.3},
+    ]
+    result = capture.correlate(samples, margin=1.0)
+    assert [item["endpoint"] for item in result] == ["POST /login", "GET /info"]
+    assert [t for t, _ in result[0]["server"][STREAM]] == [1004.0, 1005.0, 1006.0]
+    assert [t for t, _ in result[1]["server"][STREAM]] == [1020.0, 1021.0]
+    assert capture.correlate([]) == []
+
+
+class FakeChannel:
+    """模拟paramiko通道（select依赖fileno）：fail=True时recv抛出异常"""
+
+    def __init__(self, sock, fail=False):
+        self.sock = sock
+        self.fail = fail
+        self.closed = False
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def recv(self, size):
+        if self.fail:
+            raise OSError("channel broken")
+        return self.sock.recv(size)
+
+    def close(self):
+        self.closed = True
+
+
+def test_read_loop_drops_only_failed_channel(capture, tmp_path):
+    """单个通道recv出错：记录日志并只停止该通道，其余通道继续采集"""
+    good_remote, good_local = socket.socketpair()
+    bad_remote, bad_local = socket.socketpair()
+    good, bad = FakeChannel(good_local), FakeChannel(bad_local, fail=True)
+    capture._writers["metric_vmstat"] = _ChunkWriter(str(tmp_path / "metric_vmstat"), capture.chunk_seconds)
+    capture._channels = {good: STREAM, bad: "metric_vmstat"}
+    capture._buffers = {good: b"", bad: b""}
+    bad_remote.sendall(b"x\n")
+    good_remote.sendall(b"first\nsecond\n")
+    thread = threading.Thread(target=capture._read_loop, daemon=True)
+    thread.start()
+    try:
+        for _ in range(100):
+            if bad not in capture._channels and len(capture.read(STREAM)) == 2:
+                break
+            threading.Event().wait(0.02)
+        assert bad.closed and bad not in capture._channels
+        assert good in capture._channels and thread.is_alive()
+        assert [line for _, line in capture.read(STREAM)] == ["first", "second"]
+    finally:
+        good_remote.close()
+        thread.join(timeout=5)
+        for sock in (good_local, bad_remote, bad_local):
+            sock.close()
+    assert not thread.is_alive()
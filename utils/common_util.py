@@ -4,6 +4,7 @@ import configparser
 import hashlib
 import time
 import functools
+from collections.abc import Iterator
 import requests  # 提前导入，解决retry装饰器依赖
 from utils.path_util import CONFIG_PATH, PROJECT_ROOT
 
@@ -65,13 +66,103 @@ def get_env_base_url(env="test"):
 
 
 # -------------------------- 基础工具函数（保留之前的核心功能） --------------------------
+# 流式读取/摘要的默认分块大小（1MB，大文件按块处理，内存占用恒定）
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class StreamHasher:
+    """
+    增量摘要计算器（分块update，可同时计算多种算法）
+    用于大文件上传/下载：边传输边计算，无需把完整内容读入内存
+    """
+
+    def __init__(self, algorithms=("md5", "sha256")):
+        """
+        :param algorithms: 摘要算法名称（hashlib支持的名称，如md5、sha256）
+        """
+        self._hashers = {name: hashlib.new(name) for name in algorithms}
+        self.size = 0
+
+    def update(self, chunk):
+        """追加一块数据（str按utf-8编码）"""
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        for hasher in self._hashers.values():
+            hasher.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self, algorithm=None):
+        """
+        获取摘要结果
+        :param algorithm: 指定算法时返回该算法的摘要字符串，否则返回{算法: 摘要}字典
+        """
+        if algorithm:
+            return self._hashers[algorithm].hexdigest()
+        return {name: hasher.hexdigest() for name, hasher in self._hashers.items()}
+
+    def result(self):
+        """返回全部摘要及总字节数，例：{"md5": "...", "sha256": "...", "size": 1024}"""
+        result = self.hexdigest()
+        result["size"] = self.size
+        return result
+
+
+def iter_file_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按块读取文件（生成器，常量内存）
+    :param file: 文件路径 或 已打开的二进制文件对象
+    :param chunk_size: 每块字节数
+    """
+    if hasattr(file, "read"):
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        return
+    with open(file, "rb") as f:
+        yield from iter_file_chunks(f, chunk_size)
+
+
+def _digest(data, algorithm):
+    """
+    计算摘要（md5_encrypt/sha256_encrypt的公共实现）
+    - 文件对象/迭代器（如生成器）：按块增量计算
+    - bytes/bytearray/memoryview：直接计算
+    - 其他类型：转字符串后按utf-8计算（保持原有行为）
+    """
+    hasher = StreamHasher((algorithm,))
+    if hasattr(data, "read"):
+        data = iter_file_chunks(data)
+    if isinstance(data, Iterator):
+        for chunk in data:
+            hasher.update(chunk)
+    elif isinstance(data, (bytes, bytearray, memoryview)):
+        hasher.update(data)
+    else:
+        hasher.update(data if isinstance(data, str) else str(data))
+    return hasher.hexdigest(algorithm)
+
+
 def md5_encrypt(data):
-    """MD5加密（返回32位小写结果）"""
-    if not isinstance(data, str):
-        data = str(data)
-    md5 = hashlib.md5()
-    md5.update(data.encode("utf-8"))
-    return md5.hexdigest()
+    """MD5加密（返回32位小写结果；支持字符串、bytes、文件对象、分块生成器）"""
+    return _digest(data, "md5")
+
+
+def sha256_encrypt(data):
+    """SHA-256摘要（返回64位小写结果；支持类型同md5_encrypt）"""
+    return _digest(data, "sha256")
+
+
+def file_checksum(file_path, algorithms=("md5", "sha256"), chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    计算文件校验值（分块读取，支持GB级文件）
+    :return: {"md5": "...", "sha256": "...", "size": 文件字节数}
+    """
+    hasher = StreamHasher(algorithms)
+    for chunk in iter_file_chunks(file_path, chunk_size):
+        hasher.update(chunk)
+    return hasher.result()
 
 
 def get_timestamp():
@@ -0,0 +1,165 @@
+"""加密签名工具类：AES字段加密、时间戳签名（MD5/HMAC-SHA256）、BaseRequest请求变换（密钥/加密器缓存 + 结果LRU缓存）"""
+import hmac
+import json
+import base64
+import hashlib
+import functools
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+from utils.common_util import read_config, md5_encrypt, get_timestamp
+
+# 确定性结果（同输入同输出）的LRU缓存容量
+CACHE_SIZE = 4096
+
+
+# -------------------------- AES加密（加密器按密钥缓存，结果LRU缓存） --------------------------
+@functools.lru_cache(maxsize=32)
+def _ecb_cipher(key: bytes):
+    """ECB加密器缓存：密钥扩展只做一次（ECB无状态，同一对象可重复加密）"""
+    return AES.new(key, AES.MODE_ECB)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def aes_encrypt(plaintext: str, key: str, mode: str = "ECB", iv: str = None) -> str:
+    """
+    AES加密（PKCS7填充，返回Base64字符串，与登录接口password字段格式一致）
+    固定密钥/IV下结果确定，同一明文重复加密直接命中缓存
+    :param plaintext: 明文
+    :param key: 密钥（16/24/32字节对应AES-128/192/256）
+    :param mode: ECB 或 CBC
+    :param iv: CBC模式的初始向量（16字节，CBC模式必填）
+    :raises ValueError: 模式不支持，或CBC模式IV缺失/长度不是16字节
+    """
+    data = pad(plaintext.encode("utf-8"), AES.block_size)
+    if mode.upper() == "ECB":
+        encrypted = _ecb_cipher(key.encode("utf-8")).encrypt(data)
+    elif mode.upper() == "CBC":
+        if not iv or len(iv.encode("utf-8")) != AES.block_size:
+            raise ValueError(f"AES CBC模式需要16字节的IV（配置项 CRYPTO.aes_iv），当前值：{iv!r}")
+        # CBC加密器有状态（链式IV），每次需新建
+        encrypted = AES.new(key.encode("utf-8"), AES.MODE_CBC, iv=iv.encode("utf-8")).encrypt(data)
+    else:
+        raise ValueError(f"不支持的AES模式：{mode}，可选：ECB/CBC")
+    return base64.b64encode(encrypted).decode("utf-8")
+
+
+# -------------------------- 时间戳签名 --------------------------
+def canonical_string(params: dict, timestamp: int) -> str:
+    """
+    签名原文：参数按key升序拼接为 k1=v1&k2=v2&timestamp=xxx（None值跳过，非字符串值按紧凑JSON序列化）
+    """
+    items = dict(params or {})
+    items["timestamp"] = timestamp
+    parts = []
+    for key in sorted(items):
+        value = items[key]
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        parts.append(f"{key}={value}")
+    return "&".join(parts)
+
+
+class Signer:
+    """
+    请求签名器
+    - md5：sign = md5(签名原文 + secret)，基于common_util.md5_encrypt
+    - hmac-sha256：sign = HMAC-SHA256(secret, 签名原文)，预先完成密钥填充，每次签名只复制内部状态
+    - 签名原文相同时直接命中LRU缓存（压测时同一秒内的相同请求无需重复计算）
+    """
+
+    def __init__(self, secret: str, algorithm: str = "md5", cache_size: int = CACHE_SIZE):
+        algorithm = algorithm.lower()
+        if algorithm not in ("md5", "hmac-sha256"):
+            raise ValueError(f"不支持的签名算法：{algorithm}，可选：md5/hmac-sha256")
+        self.secret = secret
+        self.algorithm = algorithm
+        self._hmac_base = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256) \
+            if algorithm == "hmac-sha256" else None
+        self._sign_cached = functools.lru_cache(maxsize=cache_size)(self._sign_raw)
+
+    def _sign_raw(self, message: str) -> str:
+        if self._hmac_base is None:
+            return md5_encrypt(message + self.secret)
+        mac = self._hmac_base.copy()
+        mac.update(message.encode("utf-8"))
+        return mac.hexdigest()
+
+    def sign(self, params: dict, timestamp: int = None) -> dict:
+        """
+        计算签名
+        :param params: 参与签名的参数（查询参数 + 请求体顶层字段）
+        :param timestamp: 秒级时间戳，默认当前时间
+        :return: {"timestamp": 时间戳, "sign": 签名}
+        """
+        timestamp = timestamp if timestamp is not None else get_timestamp()
+        return {"timestamp": timestamp, "sign": self._sign_cached(canonical_string(params, timestamp))}
+
+    def sign_batch(self, params_list: list, timestamp: int = None) -> list:
+        """
+        批量签名（压测预生成用）：整批共用一个时间戳，重复参数只计算一次
+        :return: 与params_list一一对应的签名结果列表
+        """
+        timestamp = timestamp if timestamp is not None else get_timestamp()
+        return [self.sign(params, timestamp) for params in params_list]
+
+    def cache_info(self):
+        """签名缓存命中情况（functools.lru_cache统计）"""
+        return self._sign_cached.cache_info()
+
+
+# -------------------------- BaseRequest请求变换 --------------------------
+class AESFieldTransform:
+    """
+    请求变换：加密JSON请求体中的指定字段（如登录密码），测试数据可直接写明文
+    用法：request_util.add_transform(AESFieldTransform())
+    """
+
+    def __init__(self, fields=None, key: str = None, mode: str = None, iv: str = None):
+        """
+        :param fields: 需加密的字段名列表，默认读取配置 CRYPTO.encrypt_fields
+        :param key/mode/iv: AES参数，默认读取配置 CRYPTO.aes_key/aes_mode/aes_iv
+        """
+        if fields is None:
+            fields = [f.strip() for f in read_config("CRYPTO", "encrypt_fields").split(",") if f.strip()]
+        self.fields = list(fields)
+        self.key = key or read_config("CRYPTO", "aes_key")
+        self.mode = mode or read_config("CRYPTO", "aes_mode")
+        self.iv = iv or read_config("CRYPTO", "aes_iv") or None
+
+    def __call__(self, method: str, path: str, headers: dict, kwargs: dict) -> None:
+        body = kwargs.get("json")
+        if not isinstance(body, dict) or not any(field in body for field in self.fields):
+            return
+        # 复制请求体再修改，避免改动调用方（测试数据模块）中的原始字典
+        body = dict(body)
+        for field in self.fields:
+            if isinstance(body.get(field), str):
+                body[field] = aes_encrypt(body[field], self.key, self.mode, self.iv)
+        kwargs["json"] = body
+
+
+class SignTransform:
+    """
+    请求变换：对查询参数和JSON请求体顶层字段做时间戳签名，签名结果写入请求头
+    用法：request_util.add_transform(SignTransform())
+    """
+
+    def __init__(self, signer: Signer = None, timestamp_header: str = "timestamp", sign_header: str = "sign"):
+        """
+        :param signer: 签名器，默认按配置 CRYPTO.sign_secret/sign_algorithm 创建
+        :param timestamp_header: 时间戳请求头名称
+        :param sign_header: 签名请求头名称
+        """
+        self.signer = signer or Signer(read_config("CRYPTO", "sign_secret"), read_config("CRYPTO", "sign_algorithm"))
+        self.timestamp_header = timestamp_header
+        self.sign_header = sign_header
+
+    def __call__(self, method: str, path: str, headers: dict, kwargs: dict) -> None:
+        params = dict(kwargs.get("params") or {})
+        if isinstance(kwargs.get("json"), dict):
+            params.update(kwargs["json"])
+        result = self.signer.sign(params)
+        headers[self.timestamp_header] = str(result["timestamp"])
+        headers[self.sign_header] = result["sign"]
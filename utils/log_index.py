@@ -0,0 +1,239 @@
+"""
+日志索引工具：离线为运行日志（含RotatingFileHandler轮转备份）建立紧凑的磁盘索引，按用例/请求快速检索
+- 索引键：用例nodeid、请求关联ID、接口路径、状态码（依赖log_util的[test=... req=...]字段和BaseRequest的"请求摘要"行）
+- 索引文件：logs/.index/<日志文件名>.idx，二进制格式，查询时mmap只读，按键哈希二分查找，不做全文件扫描
+- 日志文件变化（追加/轮转改名）后自动重建对应索引
+使用方式（项目根目录执行）：
+   python -m utils.log_index --test "test_cases/test_login.py::test_login_success"
+   python -m utils.log_index --req 3f2a... / --path /syslogin/admin/user/login --status 500
+"""
+import os
+import re
+import sys
+import mmap
+import glob
+import struct
+import hashlib
+import argparse
+from array import array
+from utils.path_util import LOG_PATH
+
+# -------------------------- 索引文件格式 --------------------------
+# 文件头：魔数 + (日志大小, 日志mtime_ns, 日志头部摘要, 键数量, 倒排项数量)
+INDEX_MAGIC = b"ATLOGIX1"
+HEADER = struct.Struct("<QQ32sQQ")
+# 键表项（按键哈希升序）：(键哈希, 倒排起始下标, 倒排项数量)
+KEY_ENTRY = struct.Struct("<QQI")
+# 倒排项：日志行的字节偏移
+POSTING = struct.Struct("<Q")
+# 日志头部摘要的读取长度（轮转改名后 大小/mtime 可能不变，用头部内容区分不同文件）
+HEAD_BYTES = 4096
+
+# 日志行解析规则（与utils.log_util.LOG_CONTEXT_FORMAT、BaseRequest._log_summary保持一致）
+CONTEXT_RE = re.compile(rb"\[test=(.*?) req=(\S+?)\]")
+SUMMARY_RE = re.compile("请求摘要：method=(\\S+) path=(\\S+) status=(\\S+)".encode("utf-8"))
+RECORD_START_RE = re.compile(rb"\d{4}-\d{2}-\d{2} ")
+
+
+def key_hash(kind: str, value: str) -> int:
+    """索引键哈希（64位），kind取值：test/req/path/status"""
+    digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _file_signature(log_file: str) -> tuple:
+    """日志文件签名：(大小, mtime_ns, 头部摘要)，用于判断索引是否过期"""
+    stat = os.stat(log_file)
+    with open(log_file, "rb") as f:
+        head_digest = hashlib.sha256(f.read(HEAD_BYTES)).digest()
+    return stat.st_size, stat.st_mtime_ns, head_digest
+
+
+def build_index(log_file: str, index_file: str) -> None:
+    """
+    扫描日志文件建立索引（逐行流式读取，不整体载入日志；内存占用与索引规模成正比）
+    - 用例、请求关联ID：索引该上下文下的所有日志行（异常堆栈等续行归属上一条日志）
+    - 接口路径、状态码：通过"请求摘要"行关联到请求，索引该请求的全部日志行
+    """
+    signature = _file_signature(log_file)
+    postings = {}
+    request_lines = {}
+    request_keys = {}
+    context = (None, None)
+    offset = 0
+    with open(log_file, "rb") as f:
+        for line in f:
+            if RECORD_START_RE.match(line):
+                match = CONTEXT_RE.search(line)
+                context = (match.group(1), match.group(2)) if match else (None, None)
+            test_id, request_id = context
+            if test_id and test_id != b"-":
+                postings.setdefault(key_hash("test", test_id.decode("utf-8", "replace")), array("Q")).append(offset)
+            if request_id and request_id != b"-":
+                req = request_id.decode("utf-8", "replace")
+                request_lines.setdefault(req, array("Q")).append(offset)
+                summary = SUMMARY_RE.search(line)
+                if summary:
+                    request_keys[req] = (summary.group(2).decode("utf-8", "replace"),
+                                         summary.group(3).decode("utf-8", "replace"))
+            offset += len(line)
+
+    for req, offsets in request_lines.items():
+        postings[key_hash("req", req)] = offsets
+        if req in request_keys:
+            path, status = request_keys[req]
+            for key in (key_hash("path", path), key_hash("status", status)):
+                postings.setdefault(key, array("Q")).extend(offsets)
+
+    # 每行只归属一个请求，各键的倒排项不会重复；并发请求的日志行交错，这里统一排序
+    keys = sorted(postings)
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    tmp_file = f"{index_file}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(HEADER.pack(*signature, len(keys), sum(len(v) for v in postings.values())))
+        start = 0
+        for key in keys:
+            f.write(KEY_ENTRY.pack(key, start, len(postings[key])))
+            start += len(postings[key])
+        for key in keys:
+            f.write(b"".join(POSTING.pack(o) for o in sorted(postings[key])))
+    # 先写临时文件再替换，避免查询进程读到半截索引
+    os.replace(tmp_file, index_file)
+
+
+class LogIndex:
+    """单个日志文件的索引（mmap只读，支持with语句自动释放）"""
+
+    def __init__(self, log_file: str, index_file: str):
+        self.log_file = log_file
+        self._index_f = open(index_file, "rb")
+        self._log_f = open(log_file, "rb")
+        self._index = mmap.mmap(self._index_f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._log = mmap.mmap(self._log_f.fileno(), 0, access=mmap.ACCESS_READ)
+        base = len(INDEX_MAGIC)
+        *_, self.key_count, _ = HEADER.unpack_from(self._index, base)
+        self._keys_start = base + HEADER.size
+        self._postings_start = self._keys_start + self.key_count * KEY_ENTRY.size
+
+    def lookup(self, kind: str, value: str) -> list:
+        """按键二分查找，返回日志行字节偏移列表（升序）"""
+        target = key_hash(kind, value)
+        low, high = 0, self.key_count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            key, start, count = KEY_ENTRY.unpack_from(self._index, self._keys_start + mid * KEY_ENTRY.size)
+            if key == target:
+                begin = self._postings_start + start * POSTING.size
+                return list(struct.unpack_from(f"<{count}Q", self._index, begin))
+            if key < target:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return []
+
+    def search(self, **criteria) -> list:
+        """
+        多条件检索（条件之间取交集）
+        :param criteria: test/req/path/status，值为None的条件忽略
+        :return: 日志行列表（字符串，按文件内顺序）
+        """
+        result = None
+        for kind, value in criteria.items():
+            if value is None:
+                continue
+            offsets = set(self.lookup(kind, str(value)))
+            result = offsets if result is None else result & offsets
+        return [self.read_line(offset) for offset in sorted(result or [])]
+
+    def read_line(self, offset: int) -> str:
+        """从mmap读取指定偏移处的一行日志"""
+        end = self._log.find(b"\n", offset)
+        return self._log[offset:end if end != -1 else len(self._log)].decode("utf-8", "replace").rstrip("\r")
+
+    def close(self) -> None:
+        self._index.close()
+        self._log.close()
+        self._index_f.close()
+        self._log_f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class LogSearcher:
+    """日志目录检索器：自动发现日志及轮转备份，按需（过期时）重建索引，跨文件按时间顺序返回结果"""
+
+    def __init__(self, log_dir: str = LOG_PATH):
+        self.log_dir = log_dir
+        self.index_dir = os.path.join(log_dir, ".index")
+
+    def log_files(self) -> list:
+        """
+        按时间先后列出日志文件：日期升序，同一天内轮转备份编号大的更早（.log.5 → ... → .log.1 → .log）
+        """
+        def order(path):
+            name = os.path.basename(path)
+            base, _, backup = name.partition(".log")
+            backup_no = int(backup[1:]) if backup[1:].isdigit() else 0
+            return base, -backup_no
+
+        files = glob.glob(os.path.join(self.log_dir, "api_test_*.log*"))
+        return sorted((f for f in files if os.path.getsize(f) > 0 and not f.endswith(".tmp")), key=order)
+
+    def index_path(self, log_file: str) -> str:
+        return os.path.join(self.index_dir, os.path.basename(log_file) + ".idx")
+
+    def is_fresh(self, log_file: str) -> bool:
+        """索引是否存在且与日志文件签名一致"""
+        index_file = self.index_path(log_file)
+        if not os.path.exists(index_file):
+            return False
+        with open(index_file, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return False
+            header = HEADER.unpack(f.read(HEADER.size))
+        return header[:3] == _file_signature(log_file)
+
+    def ensure_indexes(self, rebuild: bool = False) -> None:
+        """为所有日志文件建立/刷新索引（已是最新的跳过，轮转备份内容不再变化，只需建一次）"""
+        for log_file in self.log_files():
+            if rebuild or not self.is_fresh(log_file):
+                build_index(log_file, self.index_path(log_file))
+
+    def search(self, test=None, req=None, path=None, status=None, rebuild: bool = False) -> list:
+        """
+        跨全部日志文件检索
+        :return: [(日志文件名, 日志行), ...]
+        """
+        self.ensure_indexes(rebuild)
+        results = []
+        for log_file in self.log_files():
+            with LogIndex(log_file, self.index_path(log_file)) as index:
+                for line in index.search(test=test, req=req, path=path, status=status):
+                    results.append((os.path.basename(log_file), line))
+        return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="按用例/请求关联ID/接口路径/状态码检索运行日志")
+    parser.add_argument("--test", help="用例nodeid，例：test_cases/test_login.py::test_login_success")
+    parser.add_argument("--req", help="请求关联ID（X-Request-ID）")
+    parser.add_argument("--path", help="接口路径，例：/syslogin/admin/user/login")
+    parser.add_argument("--status", help="HTTP状态码（连接失败为ERR）")
+    parser.add_argument("--log-dir", default=LOG_PATH, help="日志目录，默认项目logs/")
+    parser.add_argument("--rebuild", action="store_true", help="强制重建全部索引")
+    args = parser.parse_args(argv)
+    if not any([args.test, args.req, args.path, args.status]):
+        parser.error("至少需要一个检索条件：--test/--req/--path/--status")
+    for file_name, line in LogSearcher(args.log_dir).search(args.test, args.req, args.path, args.status,
+                                                            rebuild=args.rebuild):
+        print(f"{file_name}: {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 import os
 import logging
 import time
+from contextvars import ContextVar
 from logging.handlers import RotatingFileHandler
 from utils.path_util import LOG_PATH
 from utils.common_util import read_config
@@ -27,6 +28,21 @@ class ColoredFormatter(logging.Formatter):
         # 返回带颜色的日志（仅控制台输出用，文件输出不带颜色）
         return f"{color_code}{log_message}{RESET_CODE}"
 
+# -------------------------- 日志上下文（用例ID/请求关联ID） --------------------------
+# 当前用例nodeid、当前请求关联ID（未绑定时为"-"），由conftest和BaseRequest负责设置
+current_test_id = ContextVar("current_test_id", default="-")
+current_request_id = ContextVar("current_request_id", default="-")
+# 文件日志中上下文字段的固定格式，utils.log_index按此格式解析建索引
+LOG_CONTEXT_FORMAT = "[test=%(test_id)s req=%(request_id)s]"
+
+
+class ContextFilter(logging.Filter):
+    """给每条日志附加用例ID和请求关联ID字段（test_id/request_id）"""
+    def filter(self, record):
+        record.test_id = current_test_id.get()
+        record.request_id = current_request_id.get()
+        return True
+
 # -------------------------- 初始化日志 --------------------------
 def init_logger():
     # 1. 读取日志配置
@@ -45,7 +61,7 @@ def init_logger():
         log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
     )
     file_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s",
+        f"%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - {LOG_CONTEXT_FORMAT} - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     file_handler.setFormatter(file_formatter)
@@ -62,6 +78,7 @@ def init_logger():
     if not logger.handlers:  # 避免重复添加
         logger.addHandler(file_handler)
         logger.addHandler(console_handler)
+        logger.addFilter(ContextFilter())
 
     return logger
 
@@ -0,0 +1,247 @@
+"""性能工具类：接口耗时采集、SLA断言、历史耗时存储（SQLite）、跨运行性能回归检测"""
+import os
+import math
+import time
+import uuid
+import sqlite3
+import threading
+from utils.common_util import read_config
+
+
+# -------------------------- 统计函数 --------------------------
+def percentile(values, pct):
+    """
+    计算百分位数（线性插值，与numpy默认算法一致）
+    :param values: 数值列表
+    :param pct: 百分位（0~100），例：95
+    :return: 百分位数值；列表为空时返回None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = math.floor(k)
+    upper = math.ceil(k)
+    if lower == upper:
+        return ordered[int(k)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def mann_whitney_u(current, baseline):
+    """
+    Mann-Whitney U 单侧检验（H1：current整体大于baseline），正态近似+并列值校正
+    不依赖分布假设，适合长尾的接口耗时数据
+    :return: p值（越小越说明current显著变慢）
+    """
+    n1, n2 = len(current), len(baseline)
+    combined = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    # 计算秩（并列值取平均秩），同时累计并列校正项
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = avg_rank
+        tie_count = j - i + 1
+        tie_term += tie_count ** 3 - tie_count
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u1 = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    # 连续性校正后的z值，单侧p值 = 1 - Φ(z)
+    z = (u1 - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+# -------------------------- 历史耗时存储 --------------------------
+class LatencyStore:
+    """接口耗时历史库（SQLite，默认 reports/latency_history.db）"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS latency_samples ("
+                "run_id TEXT NOT NULL, run_time REAL NOT NULL, endpoint TEXT NOT NULL, "
+                "test_id TEXT, status_code INTEGER, elapsed_ms REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_latency_endpoint ON latency_samples (endpoint, run_time)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def save_run(self, run_id, samples):
+        """
+        保存一次运行的全部耗时样本
+        :param samples: 样本列表，每项格式：{"endpoint", "test_id", "status_code", "elapsed_ms"}
+        """
+        run_time = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO latency_samples VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, run_time, s["endpoint"], s["test_id"], s["status_code"], s["elapsed_ms"])
+                 for s in samples]
+            )
+
+    def baseline(self, endpoint, exclude_run_id, runs=10):
+        """
+        获取滚动基线：该接口最近N次运行（不含本次）的全部耗时样本
+        :return: 耗时列表（毫秒）
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT elapsed_ms FROM latency_samples WHERE endpoint = ? AND run_id IN ("
+                "  SELECT run_id FROM latency_samples WHERE endpoint = ? AND run_id != ?"
+                "  GROUP BY run_id ORDER BY MAX(run_time) DESC LIMIT ?)",
+                (endpoint, endpoint, exclude_run_id, runs)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+# -------------------------- 耗时采集 + SLA + 回归检测 --------------------------
+class LatencyRecorder:
+    """
+    接口耗时记录器（全局单例 latency_recorder）
+    - BaseRequest 每次请求完成后调用 record() 记录耗时
+    - conftest 钩子负责：标记当前用例、校验 @pytest.mark.sla、运行结束后对比历史基线
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+        self.db_path = read_config("PERF", "latency_db")
+        self.baseline_runs = int(read_config("PERF", "baseline_runs"))
+        self.min_samples = int(read_config("PERF", "min_samples"))
+        self.p_value = float(read_config("PERF", "regression_p_value"))
+        self.min_ratio = float(read_config("PERF", "regression_min_ratio"))
+
+    def reset(self):
+        """开始新一次运行：清空样本和结果，生成新的run_id（常驻进程多次运行时由conftest在会话开始时调用）"""
+        self.samples = []
+        self.current_test = None
+        self.sla_violations = []
+        self._regressions = None
+        # xdist多进程时所有worker共用同一个run_id，保证一次运行的数据归为一组
+        self.run_id = os.environ.get("PYTEST_XDIST_TESTRUNUID") or f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    def record(self, method, path, elapsed_ms, status_code):
+        """
+        记录一次请求耗时（接口标识：请求方法 + 接口路径，例：POST /syslogin/admin/user/login）
+        同时记录请求起止时间（epoch秒），供core.ssh_capture与服务端日志/指标按时间对齐
+        """
+        end_time = time.time()
+        with self._lock:
+            self.samples.append({
+                "endpoint": f"{method.upper()} {path}",
+                "test_id": self.current_test,
+                "status_code": status_code,
+                "elapsed_ms": elapsed_ms,
+                "start_time": end_time - elapsed_ms / 1000,
+                "end_time": end_time
+            })
+
+    def test_samples(self, test_id, endpoint=None):
+        """获取某个用例（可选限定接口）的耗时列表"""
+        return [s["elapsed_ms"] for s in self.samples
+                if s["test_id"] == test_id and (endpoint is None or s["endpoint"] == endpoint)]
+
+    def check_sla(self, test_id, endpoint=None, **limits):
+        """
+        校验用例耗时是否满足SLA（单位毫秒）
+        :param limits: 支持 p50/p90/p95/p99/max，例：p95=200, max=500
+        :raises AssertionError: 任一指标超标时抛出（pytest将用例标记为失败）
+        """
+        values = self.test_samples(test_id, endpoint)
+        if not values:
+            return
+        failures = []
+        for name, limit in limits.items():
+            actual = max(values) if name == "max" else percentile(values, float(name.lstrip("p")))
+            if actual > limit:
+                failures.append(f"{name}={actual:.1f}ms > {limit}ms")
+        if failures:
+            message = f"SLA不达标（{endpoint or '全部接口'}，样本数{len(values)}）：{'；'.join(failures)}"
+            self.sla_violations.append({"test_id": test_id, "message": message})
+            raise AssertionError(message)
+
+    def detect_regressions(self):
+        """
+        与历史滚动基线对比，检测本次运行变慢的接口（结果缓存，多个钩子调用只计算一次）
+        判定规则：
+        1. 本次中位数 / 基线中位数 < regression_min_ratio → 视为正常波动
+        2. 两侧样本数均 >= min_samples → Mann-Whitney U 检验 p < regression_p_value 判为回归
+        3. 样本不足时 → 本次最小耗时仍高于基线P95 判为回归
+        :return: 回归列表，每项：{"endpoint", "baseline_p50", "current_p50", "ratio", "p_value"}
+        """
+        if self._regressions is not None:
+            return self._regressions
+        self._regressions = []
+        if not self.samples:
+            return self._regressions
+        store = LatencyStore(self.db_path)
+        endpoints = sorted({s["endpoint"] for s in self.samples})
+        for endpoint in endpoints:
+            current = [s["elapsed_ms"] for s in self.samples if s["endpoint"] == endpoint]
+            baseline = store.baseline(endpoint, self.run_id, self.baseline_runs)
+            if not baseline:
+                continue
+            base_p50, cur_p50 = percentile(baseline, 50), percentile(current, 50)
+            ratio = cur_p50 / base_p50 if base_p50 else float("inf")
+            if ratio < self.min_ratio:
+                continue
+            p_value = None
+            if len(current) >= self.min_samples and len(baseline) >= self.min_samples:
+                p_value = mann_whitney_u(current, baseline)
+                regressed = p_value < self.p_value
+            else:
+                regressed = min(current) > percentile(baseline, 95)
+            if regressed:
+                self._regressions.append({
+                    "endpoint": endpoint, "baseline_p50": base_p50, "current_p50": cur_p50,
+                    "ratio": ratio, "p_value": p_value
+                })
+        return self._regressions
+
+    def export(self):
+        """导出本进程的样本和SLA结果（pytest-xdist worker通过workeroutput回传给主进程）"""
+        with self._lock:
+            return {"samples": list(self.samples), "sla_violations": list(self.sla_violations)}
+
+    def merge(self, data):
+        """合并worker回传的样本和SLA结果（主进程汇总后统一做回归检测、写历史库）"""
+        with self._lock:
+            self.samples.extend(data.get("samples", []))
+            self.sla_violations.extend(data.get("sla_violations", []))
+            self._regressions = None
+
+    def save(self):
+        """将本次运行的耗时样本写入历史库（作为后续运行的基线）"""
+        if self.samples:
+            LatencyStore(self.db_path).save_run(self.run_id, self.samples)
+
+    def summary_lines(self):
+        """生成运行汇总文本（终端汇总与HTML报告共用）"""
+        lines = []
+        for violation in self.sla_violations:
+            lines.append(f"[SLA] {violation['test_id']}：{violation['message']}")
+        for item in self.detect_regressions():
+            p_text = f"，p={item['p_value']:.4f}" if item["p_value"] is not None else "（样本不足，按基线P95判定）"
+            lines.append(
+                f"[性能回归] {item['endpoint']}：P50 {item['baseline_p50']:.1f}ms → "
+                f"{item['current_p50']:.1f}ms（{item['ratio']:.2f}倍{p_text}）"
+            )
+        return lines
+
+
+# 全局耗时记录器
+latency_recorder = LatencyRecorder()